@@ -0,0 +1,82 @@
+import math
+
+LUT_BITS = 8
+LUT_SIZE = 1 << LUT_BITS
+PHASE_BITS = 24  # phase is a fixed-point fraction of one cycle
+PHASE_MASK = (1 << PHASE_BITS) - 1
+PHASE_SHIFT = PHASE_BITS - LUT_BITS
+TIME_MASK = (1 << 30) - 1  # keep the clock a small int (wraps after ~12 days)
+
+
+def sine(t: float) -> float:
+    return math.sin(2 * math.pi * t)
+
+
+def triangle(t: float) -> float:
+    return 4 * t - 1 if t < 0.5 else 3 - 4 * t
+
+
+def ease_in_out(t: float) -> float:
+    # smoothstep up for the first half of the cycle, back down for the second
+    u = 2 * t if t < 0.5 else 2 - 2 * t
+    return 2 * u * u * (3 - 2 * u) - 1
+
+
+# name -> shape of one cycle, t in [0, 1) -> [-1, 1]
+EASINGS = {
+    "sine": sine,
+    "triangle": triangle,
+    "ease_in_out": ease_in_out,
+}
+
+
+class Curve:
+    """
+    A periodic animation value. The shape is sampled once into a table
+    already scaled by `amplitude`, and the phase is a small integer, so
+    reading `value` each frame costs a shift and a list lookup and allocates
+    nothing (floats are boxed on MicroPython).
+    """
+
+    def __init__(self, easing: str, period_ms: int, amplitude: float, phase: int):
+        shape = EASINGS[easing]
+        self.table = [amplitude * shape(i / LUT_SIZE) for i in range(LUT_SIZE)]
+        self.step = (1 << PHASE_BITS) // period_ms  # phase per ms
+        self.phase = phase
+
+    def advance(self, delta_ms: int) -> None:
+        self.phase = (self.phase + delta_ms * self.step) & PHASE_MASK
+
+    @property
+    def value(self) -> float:
+        return self.table[self.phase >> PHASE_SHIFT]
+
+
+class AnimationClock:
+    """
+    The one clock every animation runs from. The app advances it once per
+    frame; screens ask for a named curve instead of keeping their own time
+    accumulator, and curves with the same settings are shared, so everything
+    that breathes breathes in step.
+    """
+
+    def __init__(self):
+        self.time_ms = 0
+        self.curves: dict[tuple[str, int, float], Curve] = {}
+
+    def curve(self, easing: str, period_ms: int, amplitude: float = 1.0) -> Curve:
+        key = (easing, period_ms, amplitude)
+        curve = self.curves.get(key)
+        if curve is None:
+            # start in phase with the clock rather than at zero
+            phase = (self.time_ms % period_ms) * ((1 << PHASE_BITS) // period_ms)
+            curve = self.curves[key] = Curve(easing, period_ms, amplitude, phase)
+        return curve
+
+    def advance(self, delta_ms: int) -> None:
+        self.time_ms = (self.time_ms + delta_ms) & TIME_MASK
+        for curve in self.curves.values():
+            curve.advance(delta_ms)
+
+
+clock = AnimationClock()
@@ -3,13 +3,16 @@ import asyncio
 import time
 
 from app_components import clear_background
-from events.input import Buttons, BUTTON_TYPES
+from events.input import ButtonDownEvent
 from system.eventbus import eventbus
 from system.scheduler.events import RequestStopAppEvent
 
+from . import animation, history
 from .multiplayergame.multiplayergamesetup import MultiPlayerReactionGameSetup
 from .mainmenu import GameType, MainMenu
 from .focusable import Focusable
+from .inputqueue import InputQueue
+from .framescheduler import FrameRate, FrameScheduler
 from .singleplayergame import SinglePlayerReactionGame
 
 
@@ -20,8 +23,13 @@ class Reactz(App):
     request_fast_updates: bool = False  # for SASPPU firmware
 
     def __init__(self):
-        self.button_states = Buttons(self)
+        # read the history header now rather than when the first round ends
+        history.store.load()
+        self.input = InputQueue(self)
         self.focus = MainMenu()
+        self.frames = FrameScheduler()
+        # a press ends an idle frame early
+        eventbus.on(ButtonDownEvent, self.frames.wake, self)
 
     async def run(self, render_update):
         last_time = time.ticks_ms()  # type: ignore
@@ -34,65 +42,74 @@ class Reactz(App):
             asyncio.create_task(self.focus.start())  # type: ignore
 
         while True:
-            # yield to the event loop for 50 ms so button events get delivered
-            # await asyncio.sleep_ms(50)
-            await render_update()
-
-            if self.button_states.get(BUTTON_TYPES["CANCEL"]):
-                if self.focus and isinstance(self.focus, MainMenu):
-                    # host a new reaction game
-                    self.focus = MultiPlayerReactionGameSetup(gameType=GameType.HOSTING)
-                    self.menuTask = asyncio.create_task(self.focus.start())
-                elif self.focus:
-                    self.focus.handle_button("CANCEL")
-
-            if self.button_states.get(BUTTON_TYPES["LEFT"]):
-                if self.focus and isinstance(self.focus, MainMenu):
-                    # if we are in the main menu, exit the app
-                    self.focus = None
-                    self.quit()
-                elif self.focus:
-                    # if we are in a game, return to the main menu
-                    self.focus.close()
-                    if self.menuTask:
-                        self.menuTask.cancel()
-                    self.focus = MainMenu()
-                    asyncio.create_task(self.focus.start())
-
-            elif self.button_states.get(BUTTON_TYPES["RIGHT"]):
-                if self.focus and isinstance(self.focus, MainMenu):
-                    # join an existing reaction game
-                    self.focus = MultiPlayerReactionGameSetup(gameType=GameType.JOINING)
-                    self.menuTask = asyncio.create_task(self.focus.start())
-                elif self.focus:
-                    self.focus.handle_button("RIGHT")
-
-            elif self.button_states.get(BUTTON_TYPES["CONFIRM"]):
-                if self.focus:
-                    self.focus.handle_button("CONFIRM")
-
-            elif self.button_states.get(BUTTON_TYPES["UP"]):
-                if self.focus:
-                    self.focus.handle_button("UP")
-
-            elif self.button_states.get(BUTTON_TYPES["DOWN"]):
-                if self.focus and isinstance(self.focus, MainMenu):
-                    # start a new reaction game
-                    self.focus = SinglePlayerReactionGame()
-                    asyncio.create_task(self.focus.start())
-                elif self.focus:
-                    self.focus.handle_button("DOWN")
-
-            self.button_states.clear()
+            # handle every press since the last frame, in order
+            press = self.input.get_nowait()
+            while press is not None:
+                self.dispatch(*press)
+                press = self.input.get_nowait()
 
             # update & redraw
             cur_time = time.ticks_ms()  # type: ignore
             delta = time.ticks_diff(cur_time, last_time)  # type: ignore
             self.update(delta)
-            await render_update()
+            rate = self.focus.frame_rate() if self.focus else FrameRate.NORMAL
+            self.request_fast_updates = rate == FrameRate.MAX
+            if self.needs_redraw():
+                await render_update()
+                if self.focus:
+                    self.focus.presented(time.ticks_us())  # type: ignore
+            # sleep out the rest of the frame; button events are delivered meanwhile
+            await self.frames.wait(rate)
             last_time = cur_time
 
+    def dispatch(self, button: str, pressed_us: int) -> None:
+        """Act on one press; `pressed_us` is its ticks_us timestamp."""
+        if button == "CANCEL":
+            if self.focus and isinstance(self.focus, MainMenu):
+                # host a new reaction game
+                self.focus = MultiPlayerReactionGameSetup(gameType=GameType.HOSTING)
+                self.menuTask = asyncio.create_task(self.focus.start())
+            elif self.focus:
+                self.focus.handle_button("CANCEL", pressed_us)
+
+        elif button == "LEFT":
+            if self.focus and isinstance(self.focus, MainMenu):
+                # if we are in the main menu, exit the app
+                self.focus = None
+                self.quit()
+            elif self.focus:
+                # if we are in a game, return to the main menu
+                self.focus.close()
+                history.store.flush()
+                if self.menuTask:
+                    self.menuTask.cancel()
+                self.focus = MainMenu()
+                asyncio.create_task(self.focus.start())
+
+        elif button == "RIGHT":
+            if self.focus and isinstance(self.focus, MainMenu):
+                # join an existing reaction game
+                self.focus = MultiPlayerReactionGameSetup(gameType=GameType.JOINING)
+                self.menuTask = asyncio.create_task(self.focus.start())
+            elif self.focus:
+                self.focus.handle_button("RIGHT", pressed_us)
+
+        elif button == "DOWN":
+            if self.focus and isinstance(self.focus, MainMenu):
+                # start a new reaction game
+                self.focus = SinglePlayerReactionGame()
+                asyncio.create_task(self.focus.start())
+            elif self.focus:
+                self.focus.handle_button("DOWN", pressed_us)
+
+        elif self.focus:
+            # CONFIRM, UP
+            self.focus.handle_button(button, pressed_us)
+
     def quit(self):
+        self.input.close()
+        eventbus.remove(ButtonDownEvent, self.frames.wake, self)
+        history.store.flush()
         eventbus.emit(RequestStopAppEvent(self))
 
     def draw(self, ctx):
@@ -107,9 +124,14 @@ class Reactz(App):
 
         if self.focus:
             self.focus.draw(ctx)
+            self.focus.drawn()
         ctx.restore()
 
+    def needs_redraw(self) -> bool:
+        return not self.cleared or self.focus is None or self.focus.needs_redraw()
+
     def update(self, delta: int):
+        animation.clock.advance(delta)
         if self.focus:
             self.focus.update(delta)
         else:
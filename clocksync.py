@@ -0,0 +1,155 @@
+import asyncio
+import utime
+
+from . import protocol
+from .messagequeue import MessageQueue
+from .multiplayergame.room import MACAddress
+
+MAX_CLOCK_SAMPLES = 8
+
+
+def median(values: list[int]) -> int:
+    ordered = sorted(values)
+    return ordered[len(ordered) // 2]
+
+
+class PeerClock:
+    """Clock estimate for one peer, from the most recent ping/pong samples."""
+
+    offset_ms: int = 0  # peer ticks_ms - our ticks_ms
+    rtt_ms: int = 0
+    jitter_ms: int = 0  # median absolute deviation of the offset samples
+
+    def __init__(self):
+        self.offsets: list[int] = []
+        self.rtts: list[int] = []
+
+    def add_sample(self, offset_ms: int, rtt_ms: int) -> None:
+        self.offsets.append(offset_ms)
+        self.rtts.append(rtt_ms)
+        if len(self.offsets) > MAX_CLOCK_SAMPLES:
+            self.offsets.pop(0)
+            self.rtts.pop(0)
+        self.offset_ms = median(self.offsets)
+        self.rtt_ms = median(self.rtts)
+        self.jitter_ms = median([abs(o - self.offset_ms) for o in self.offsets])
+
+    @property
+    def samples(self) -> int:
+        return len(self.offsets)
+
+
+class ClockSync:
+    """
+    NTP-style estimate of the ticks_ms offset and round trip time to each peer.
+
+    A PING carries our send time t0; the peer answers with a PONG carrying t0,
+    its receive time t1 and its send time t2, and we note the arrival time t3.
+    Each exchange gives one sample:
+
+        offset = ((t1 - t0) + (t2 - t3)) / 2
+        rtt = (t3 - t0) - (t2 - t1)
+
+    and the per-peer estimate is the median of the recent samples, so a single
+    frame delayed by a busy radio does not skew it.
+    """
+
+    pong_timeout_ms: int = 250
+
+    def __init__(self, comms):
+        self.comms = comms
+        self.peers: dict[MACAddress, PeerClock] = {}
+        self.pongs: dict[MACAddress, MessageQueue] = {}
+        self.seq = 0
+        self.pings = MessageQueue()  # (mac, seq, t0, t1) to answer
+        self.task = asyncio.create_task(self.respond())
+        comms.on(protocol.OP_PING, self.on_ping)
+        comms.on(protocol.OP_PONG, self.on_pong)
+
+    def close(self) -> None:
+        self.task.cancel()
+
+    def on_ping(self, mac: MACAddress, opcode: int, room_id: int, frame: bytes) -> None:
+        t1 = utime.ticks_ms()
+        seq, t0 = protocol.decode_ping(frame)
+        self.pings.put((mac, seq, t0, t1))
+
+    async def respond(self) -> None:
+        """
+        Answer PINGs one at a time. PONGs bypass the send queue and t2 is
+        stamped just before the send, so time spent waiting here counts as
+        ours (t2 - t1), not as the return trip.
+        """
+        while True:
+            mac, seq, t0, t1 = await self.pings.get()
+            t2 = utime.ticks_ms()
+            try:
+                await self.comms.send_async(mac, protocol.encode_pong(seq, t0, t1, t2))
+            except OSError as e:
+                print(f"PONG to {mac.hex()} failed: {e}")
+
+    def on_pong(self, mac: MACAddress, opcode: int, room_id: int, frame: bytes) -> None:
+        t3 = utime.ticks_ms()
+        pongs = self.pongs.get(mac)
+        if pongs is not None:
+            pongs.put((protocol.decode_pong(frame), t3))
+
+    async def sync(
+        self,
+        peer: MACAddress,
+        rounds: int = 5,
+        interval_ms: int = 20,
+    ) -> PeerClock | None:
+        """
+        Ping `peer` `rounds` times and fold the answers into its estimate.
+        Returns the updated estimate, or None if the peer never answered.
+        """
+        pongs = self.pongs.get(peer)
+        if pongs is None:
+            pongs = self.pongs[peer] = MessageQueue(maxsize=4)
+        pongs.clear()
+        clock = self.peers.get(peer)
+        for _ in range(rounds):
+            self.seq = (self.seq + 1) & 0xFF
+            seq = self.seq
+            await self.comms.send_async(
+                peer, protocol.encode_ping(seq, utime.ticks_ms())
+            )
+            try:
+                while True:
+                    (pong_seq, t0, t1, t2), t3 = await asyncio.wait_for(
+                        pongs.get(), self.pong_timeout_ms / 1000
+                    )
+                    if pong_seq == seq:
+                        break
+            except asyncio.TimeoutError:
+                print(f"No PONG from {peer.hex()} for ping {seq}")
+                continue
+            offset = (utime.ticks_diff(t1, t0) + utime.ticks_diff(t2, t3)) // 2
+            rtt = utime.ticks_diff(t3, t0) - utime.ticks_diff(t2, t1)
+            if clock is None:
+                clock = self.peers[peer] = PeerClock()
+            clock.add_sample(offset, rtt)
+            await asyncio.sleep(interval_ms / 1000)
+        if clock:
+            print(
+                f"Clock {peer.hex()}: offset {clock.offset_ms}ms rtt {clock.rtt_ms}ms jitter {clock.jitter_ms}ms"
+            )
+        return clock
+
+    def peer(self, peer: MACAddress) -> PeerClock | None:
+        return self.peers.get(peer)
+
+    def to_local(self, peer: MACAddress, peer_ticks: int) -> int | None:
+        """Convert a ticks_ms value from `peer`'s clock to ours, if synced."""
+        clock = self.peers.get(peer)
+        if clock is None:
+            return None
+        return utime.ticks_add(peer_ticks, -clock.offset_ms)
+
+    def to_peer(self, peer: MACAddress, local_ticks: int) -> int | None:
+        """Convert one of our ticks_ms values to `peer`'s clock, if synced."""
+        clock = self.peers.get(peer)
+        if clock is None:
+            return None
+        return utime.ticks_add(local_ticks, clock.offset_ms)
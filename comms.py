@@ -1,12 +1,33 @@
 import asyncio
+import utime
 from typing import Callable
 import aioespnow
+from . import protocol
+from .clocksync import ClockSync
+from .fragment import Fragmentation
+from .messagequeue import MessageQueue
+from .peertable import BROADCAST_MAC, PeerTable
+from .reliable import Delivery, ReliableChannel
+from .sendqueue import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_NORMAL,
+    PRIORITY_URGENT,
+    SendQueue,
+)
 from .multiplayergame.room import MACAddress, Room
 from .wifi_reset import wifi_reset
 
 
+def route_key(opcode: int, room_id: int) -> int:
+    return (opcode << 16) | room_id
+
+
 class Comms:
     broadcast_setup: bool = False
+    dispatch_task: asyncio.Task | None = None
+    frames_heard: int = 0  # every frame on the channel, Reactz or not
+    frames_received: int = 0
+    frames_dropped: int = 0
 
     def __init__(self):
         # A WLAN interface must be active to send()/recv()
@@ -14,91 +35,221 @@ class Comms:
 
         self.e = aioespnow.AIOESPNow()
         self.e.active(True)
+        self.peers = PeerTable(self.e)
+
+        # route key → MessageQueue or callback(mac, opcode, room_id, frame)
+        self.routes: dict[int, MessageQueue | Callable] = {}
+        self.dispatch_task = asyncio.create_task(self.dispatch())
+        self.outbox = SendQueue(self)
+        self.clock = ClockSync(self)
+        self.reliable = ReliableChannel(self)
+        self.fragments = Fragmentation(self)
+        self.on(protocol.OP_BATCH, self.on_batch)
 
     def reset(self) -> None:
+        self.close()
         self.__init__()
 
+    def close(self) -> None:
+        """Stop the dispatcher and workers so another `Comms` can own the radio."""
+        if self.dispatch_task:
+            self.dispatch_task.cancel()
+            self.dispatch_task = None
+            self.outbox.close()
+            self.clock.close()
+            self.reliable.close()
+
+    async def dispatch(self) -> None:
+        """
+        The only reader of `AIOESPNow.arecv`. Every frame is classified once and
+        handed to the route for its (opcode, room id), falling back to the route
+        for (opcode, `ANY_ROOM`). Frames nobody asked for yet are parked in a
+        bounded per-opcode queue so a late `subscribe` still sees them.
+        """
+        while True:
+            try:
+                incoming = await self.receive()
+                if incoming is None:
+                    continue
+                self.frames_received += 1
+                self.deliver(incoming)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.frames_dropped += 1
+                print(f"`comms.py`: Dropped frame: {e}")
+
+    def deliver(self, incoming: tuple[MACAddress, int, int, bytes]) -> None:
+        """Hand a classified frame to its route."""
+        _, opcode, room_id, _ = incoming
+        route = self.routes.get(route_key(opcode, room_id))
+        if route is None:
+            route = self.routes.get(route_key(opcode, protocol.ANY_ROOM))
+        if route is None:
+            route = self.subscribe(opcode)
+        if isinstance(route, MessageQueue):
+            route.put(incoming)
+        else:
+            route(*incoming)
+
+    def on_batch(self, mac: MACAddress, opcode: int, room_id: int, frame: bytes) -> None:
+        for inner in protocol.decode_batch(frame):
+            header = protocol.decode_header(inner)
+            if header is not None:
+                self.deliver((mac, header[0], header[1], inner))
+
+    def subscribe(
+        self,
+        opcode: int,
+        room_id: int = protocol.ANY_ROOM,
+        queue: MessageQueue | None = None,
+    ) -> MessageQueue:
+        """
+        Returns the queue that receives `opcode` frames for `room_id`, creating
+        it if needed. Pass `queue` to share one queue between several opcodes.
+        Frames already parked for any room are moved across.
+        """
+        key = route_key(opcode, room_id)
+        route = self.routes.get(key)
+        if isinstance(route, MessageQueue) and (queue is None or queue is route):
+            return route
+        if queue is None:
+            queue = MessageQueue()
+        self.routes[key] = queue
+        if room_id != protocol.ANY_ROOM:
+            parked = self.routes.get(route_key(opcode, protocol.ANY_ROOM))
+            if isinstance(parked, MessageQueue):
+                for item in parked.take_matching(lambda item: item[2] == room_id):
+                    queue.put(item)
+        return queue
+
+    def on(
+        self,
+        opcode: int,
+        callback: Callable[[MACAddress, int, int, bytes], None],
+        room_id: int = protocol.ANY_ROOM,
+    ) -> None:
+        """Call `callback` straight from the dispatcher for `opcode` frames."""
+        self.routes[route_key(opcode, room_id)] = callback
+
+    def unsubscribe(self, opcode: int, room_id: int = protocol.ANY_ROOM) -> None:
+        self.routes.pop(route_key(opcode, room_id), None)
+
     def setup_broadcast(self) -> None:
         self.broadcast_setup = True
-        peer_mac: bytes = b"\xff\xff\xff\xff\xff\xff"
-        self.e.add_peer(peer_mac)  # Must add_peer() before send()
+        self.add_peer(BROADCAST_MAC)  # Must add_peer() before send()
         print("Added broadcast peer")
 
-    def get_size_of_message(self, message: bytes | str) -> int:
+    def add_peer(self, mac: MACAddress) -> None:
+        """Register a peer if it isn't already, making room in the peer table if need be."""
+        self.peers.ensure(mac)
+
+    def get_size_of_message(self, message: bytes) -> int:
         """Get the size of the message in bytes."""
-        if isinstance(message, str):
-            message = message.encode()
         return len(message)
 
-    async def send_async(self, addr: bytes, message: bytes | str) -> None:
-        if isinstance(message, str):
-            message = message.encode()
-
-        encoded_reactz = "REACTZ ".encode()
-        message = encoded_reactz + message
-        print(f"Sending message {message} to {addr.hex()} async")
-        if self.get_size_of_message(message) > 250:
+    def check_size_of_message(self, message: bytes) -> None:
+        if self.get_size_of_message(message) > protocol.MAX_FRAME_SIZE:
             raise ValueError(
-                f"Oops! Message size {self.get_size_of_message(message)} exceeds maximum allowed size of 250 bytes."
+                f"Oops! Message size {self.get_size_of_message(message)} exceeds maximum allowed size of {protocol.MAX_FRAME_SIZE} bytes."
             )
-        await self.e.asend(addr, message)
 
-    def send_sync(self, addr: bytes, message: bytes | str) -> None:
-        """Send a message to a peer synchronously."""
-        if isinstance(message, str):
-            message = message.encode()
+    def post(
+        self,
+        addr: MACAddress,
+        message: bytes,
+        priority: int = PRIORITY_NORMAL,
+    ) -> bool:
+        """
+        Queue an encoded `protocol` frame for the outbound worker without
+        blocking. Returns False if the queue for `priority` dropped it.
+        """
+        return self.outbox.post(addr, message, priority)
+
+    async def send_async(self, addr: bytes, message: bytes) -> None:
+        """Send an encoded `protocol` frame to a peer now, bypassing `post`."""
+        self.check_size_of_message(message)
+        if addr == BROADCAST_MAC and self.broadcast_setup == False:
+            self.setup_broadcast()
+        self.peers.ensure(addr)
+        print(f"Sending message {message.hex()} to {addr.hex()} async")
+        await self.e.asend(addr, message)
 
-        encoded_reactz = "REACTZ ".encode()
-        message = encoded_reactz + message
-        print(f"Sending message {message} to {addr.hex()} sync")
-        if self.get_size_of_message(message) > 250:
-            raise ValueError(
-                f"Oops! Message size {self.get_size_of_message(message)} exceeds maximum allowed size of 250 bytes."
-            )
+    def send_sync(self, addr: bytes, message: bytes) -> None:
+        """Send an encoded `protocol` frame to a peer synchronously."""
+        self.check_size_of_message(message)
+        self.peers.ensure(addr)
+        print(f"Sending message {message.hex()} to {addr.hex()} sync")
         self.e.send(addr, message)
 
     async def broadcast(
         self,
-        message: str,
+        message: bytes,
         broadcast_async: bool = True,
     ) -> None:
         if self.broadcast_setup == False:
             self.setup_broadcast()
-        bcast: bytes = b"\xff\xff\xff\xff\xff\xff"
-        print(f"Sending {message} to broadcast")
         try:
             if broadcast_async:
-                await self.send_async(bcast, message)
+                await self.send_async(BROADCAST_MAC, message)
             else:
-                self.send_sync(bcast, message)
+                self.send_sync(BROADCAST_MAC, message)
         except OSError as e:
             # if code -12393, it means the peer is not available
             if e.args[0] == -12393:
                 print("No peers available")
             raise
-        print(f"Sent message {message} to broadcast")
 
     async def receive_join_requests(
         self,
+        room: Room,
         on_join: Callable[[MACAddress], None] | None = None,
-    ) -> None:
-        join_requests = await self.receive()
-        print(f"Received incoming message: {join_requests} - broadcast")
-        if join_requests:
-            mac, msg = join_requests
-            if msg.startswith("JOIN "):
-                room_name = msg.split(" ", 1)[1]
-                print(f"Join request received from {mac} for room {room_name}")
-                self.e.add_peer(mac)
-                self.send_sync(mac, f"JOINED {room_name}")
-                if on_join:
-                    on_join(mac)
-
-    async def receive(self, recv_async: bool = True) -> tuple[bytes, str] | None:
-        """Receive a message from a peer.
+        batch_window_ms: int = 20,
+    ) -> list[MACAddress]:
+        """
+        Wait for a JOIN, then accept it together with every other JOIN queued
+        within `batch_window_ms`, acknowledging the whole batch with a single
+        JOINED frame. Returns the MACs that were acknowledged.
+        """
+        requests = self.subscribe(protocol.OP_JOIN, room.room_id)
+        joiners = [(await requests.get())[0]]
+        await asyncio.sleep(batch_window_ms / 1000)
+        while len(requests) and len(joiners) < protocol.MAX_JOINED_MACS:
+            mac = requests.get_nowait()[0]
+            if mac not in joiners:
+                joiners.append(mac)
+        # only acknowledge as many newcomers as the room has slots for
+        space = room.players.capacity - len(room.players)
+        accepted = []
+        for mac in joiners:
+            if mac in room.players:
+                accepted.append(mac)
+            elif space > 0:
+                accepted.append(mac)
+                space -= 1
+            else:
+                print(f"Room {room.name} is full, ignoring JOIN from {mac.hex()}")
+        joiners = accepted
+        if not joiners:
+            return joiners
+        for mac in joiners:
+            print(f"Join request received from {mac.hex()} for room {room.name}")
+            self.add_peer(mac)
+        ack = protocol.encode_joined(room.room_id, joiners)
+        self.post(joiners[0] if len(joiners) == 1 else BROADCAST_MAC, ack)
+        if on_join:
+            for mac in joiners:
+                on_join(mac)
+        return joiners
+
+    async def receive(
+        self, recv_async: bool = True
+    ) -> tuple[MACAddress, int, int, bytes] | None:
+        """Receive a frame from a peer. Only the `dispatch` task should call this.
         Returns:
-            tuple[bytes, str] | None: A tuple containing the host's MAC address and the message string,
-            or None if no message was received within the timeout.
+            tuple[MACAddress, int, int, bytes] | None: The sender's MAC address, the opcode,
+            the room id and the raw frame (for the `protocol.decode_*` helpers), or None
+            if no Reactz frame was received within the timeout.
         """
         host: bytes
         msg: bytes | None = None
@@ -109,16 +260,13 @@ class Comms:
             host, msg = self.e.recv()
 
         if msg:
-            msg_str = msg.decode()
-            # If the message is prefixed with "REACTZ ", strip it
-            if not msg_str.startswith("REACTZ "):
-                print(
-                    f"`comms.py`: Received message from {host}: {msg_str}, but it does not start with 'REACTZ '. Ignoring."
-                )
+            self.frames_heard += 1
+            header = protocol.decode_header(msg)
+            if header is None:
+                print(f"`comms.py`: Ignoring non-Reactz frame from {host.hex()}")
                 return None
-            msg_str = msg_str[7:]
-            print(f"`comms.py`: Received message from {host}: {msg_str}")
-            return host, msg_str
+            opcode, room_id = header
+            return host, opcode, room_id, msg
         else:
             print("Timeout")
             return None
@@ -127,80 +275,134 @@ class Comms:
         self,
         room: Room,
         on_join: Callable[[], None],
+        retry_ms: int = 500,
     ) -> None:
-        # This method could be used to join a specific room
+        """Send JOIN to the host, repeating it every `retry_ms` until JOINED."""
         print(f"Joining room: {room.name}")
-        self.e.add_peer(room.host_mac)  # Ensure the host is added as a peer
-        await self.send_async(room.host_mac, f"JOIN {room.name}")
-        print(
-            f"Peered and sent JOIN request to {room.host_mac.hex()} for room {room.name}"
-        )
-        join_ack: tuple[bytes, str] | None = None
-        while join_ack is None:
-            # Wait for a JOINED message from the host
+        # the host may START soon after JOINED, so start queueing it now
+        self.subscribe(protocol.OP_START, room.room_id)
+        self.add_peer(room.host_mac)  # Ensure the host is added as a peer
+        joined = self.subscribe(protocol.OP_JOINED, room.room_id)
+        while True:
+            await self.send_async(room.host_mac, protocol.encode_join(room.room_id))
             print(f"Waiting for join acknowledgment from {room.host_mac.hex()}")
-            join_ack = await self.receive()
-            print(f"Received incoming message: {join_ack} - join_room")
-            if join_ack:
-                mac, msg = join_ack
-                if msg.startswith("JOINED "):
-                    print(f"Joined room {room.name} successfully from {mac}")
-                    on_join()
-                else:
-                    # ignore, HOST message, don't need
-                    join_ack = None
-            else:
+            try:
+                while True:
+                    mac, _, _, frame = await asyncio.wait_for(
+                        joined.get(), retry_ms / 1000
+                    )
+                    if mac == room.host_mac and protocol.joined_includes(
+                        frame, self.mac
+                    ):
+                        print(f"Joined room {room.name} successfully from {mac.hex()}")
+                        on_join()
+                        return
+            except asyncio.TimeoutError:
                 print(
                     f"No response from host {room.host_mac.hex()} when trying to join room {room.name}"
                 )
 
+    def rssi(self, mac: MACAddress) -> int | None:
+        """Signal strength of the last frame from `mac`, from the ESP-NOW peers table."""
+        peer = self.e.peers_table.get(mac)
+        if peer is None:
+            return None
+        return peer[0]
+
     @property
     def mac(self) -> bytes:
         """Local MAC address"""
         return self.sta.config("mac")
 
-    async def send_react_start(self, room: Room, delay_ms: int) -> None:
-        """Host → everyone: when to start"""
-        await self.broadcast(f"START {room.name} {delay_ms}")
+    def advertise(self, room: Room) -> None:
+        """Host → everyone: this room is open"""
+        self.post(BROADCAST_MAC, protocol.encode_host(room.room_id), PRIORITY_BACKGROUND)
+
+    def send_react_start(
+        self, room: Room, delay_ms: int, round_no: int = protocol.STANDALONE_ROUND
+    ) -> int:
+        """
+        Host → every player: when to start. Returns the target in our ticks_ms.
+        Broadcast once and repeated to anyone who hasn't ACKed until the
+        go-time, so one lost frame doesn't cost a player the round.
+        """
+        target = utime.ticks_add(utime.ticks_ms(), delay_ms)
+        self.reliable.send_many(
+            list(room.players),
+            protocol.encode_start(room.room_id, target, delay_ms, round_no),
+            deadline_ms=delay_ms,
+            priority=PRIORITY_URGENT,
+        )
+        return target
 
-    def send_react_time(self, room: Room, time_ms: int) -> None:
-        """Client → host: your reaction time"""
-        asyncio.create_task(
-            self.send_async(room.host_mac, f"TIME {room.name} {time_ms}")
+    def send_react_time(
+        self,
+        room: Room,
+        time_ms: int,
+        start_received: int = 0,
+        onset: int = 0,
+        pressed: int = 0,
+        round_no: int = protocol.STANDALONE_ROUND,
+    ) -> Delivery:
+        """
+        Client → host: your reaction time, retransmitted until ACKed.
+        The timestamps (our ticks_ms) and our clock estimate for the host let
+        it check the time against its own go-time; see `RoundAggregator`.
+        """
+        clock = self.clock.peer(room.host_mac)
+        return self.reliable.send(
+            room.host_mac,
+            protocol.encode_time(
+                room.room_id,
+                time_ms,
+                start_received,
+                onset,
+                pressed,
+                clock.offset_ms if clock else 0,
+                clock.rtt_ms // 2 if clock else protocol.UNKNOWN_MS,
+                clock.jitter_ms if clock else 0,
+                round_no,
+            ),
+            priority=PRIORITY_URGENT,
         )
 
-    def send_results(self, room: Room, results: dict[bytes, int]) -> None:
-        """Host → everyone: final scoreboard"""
-        payload = ",".join(f"{mac.hex()}:{t}" for mac, t in results.items())
-        asyncio.create_task(self.broadcast(f"RESULT {room.name} {payload}"))
-
-    async def receive_react(self, room: Room) -> int | None:
-        """Filter only REACTZ-prefixed messages"""
-        incoming = await self.receive()
-        print(f"Received incoming message: {incoming} - receive_react")
-        if incoming:
-            mac, msg = incoming
-            msg = msg.split(" ", 1)
-            print(f"Received message from {mac.hex()}: {msg}")
-            if msg[0] not in ["START"]:
-                print(f"Message {msg[0]} is not a valid reaction message. Ignoring.")
-                return None
-            if msg[1].startswith(room.name):
-                msg = msg[1][len(room.name) + 1 :]  # Strip room name and space
-                return int(msg)
-        return None
+    def send_results(
+        self,
+        room: Room,
+        results: dict[bytes, int],
+        scores: dict[bytes, tuple[int, int]] | None = None,
+        round_no: int = protocol.STANDALONE_ROUND,
+    ) -> list[Delivery]:
+        """
+        Host → every player: final scoreboard, fragmented if large. Each
+        fragment is broadcast once and only retransmitted to players that
+        haven't ACKed it, so a full room doesn't flood the send queue.
+        """
+        frame = protocol.encode_result(room.room_id, results, scores, round_no)
+        return self.fragments.send_many(list(room.players), frame)
 
-    async def receive_scores(self) -> tuple[bytes, str] | None:
+    async def receive_react(self, room: Room) -> tuple[int, int] | None:
+        """Wait for the host's START; returns (go-time in our ticks_ms, round)"""
+        mac, _, _, frame = await self.subscribe(protocol.OP_START, room.room_id).get()
+        received = utime.ticks_ms()
+        if mac != room.host_mac:
+            print(f"START from {mac.hex()} is not from the host. Ignoring.")
+            return None
+        target, delay_ms, round_no = protocol.decode_start(frame)
+        local_target = self.clock.to_local(mac, target)
+        if local_target is None:
+            # never synced with the host: fall back to the relative delay
+            print(f"No clock offset for host {mac.hex()}, using relative delay")
+            return utime.ticks_add(received, delay_ms), round_no
+        return local_target, round_no
+
+    async def receive_scores(self, room: Room) -> tuple[MACAddress, int, bytes]:
         """Receive scores from host or players.
         Returns:
-            tuple[bytes, str] | None: A tuple containing the sender's MAC address and the message string,
-            or None if no message was received within the timeout.
-        """
-        incoming = await self.receive(recv_async=True)
-        print(f"Received incoming message: {incoming} - receive_scores")
-        if incoming:
-            mac, msg = incoming
-            print(f"Received {mac.hex()}: {msg}")
-            if msg.startswith("TIME ") or msg.startswith("RESULT "):
-                return mac, msg
-        return None
+            tuple[MACAddress, int, bytes]: The sender's MAC address, the opcode
+            (`OP_TIME` or `OP_RESULT`) and the raw frame.
+        """
+        scores = self.subscribe(protocol.OP_TIME, room.room_id)
+        self.subscribe(protocol.OP_RESULT, room.room_id, queue=scores)
+        mac, opcode, _, frame = await scores.get()
+        return mac, opcode, frame
@@ -40,6 +40,23 @@ def get_room_name():
     return f"{get_random_word()} {get_random_word()}"
 
 
+def get_room_id(room_name: str) -> int:
+    """Short numeric id for a room name, sent on the wire instead of the name."""
+    first, second = room_name.split(" ", 1)
+    return random_words.index(first) * len(random_words) + random_words.index(second)
+
+
+# room ids are two word indices, so anything from here up names no room
+ROOM_ID_LIMIT = len(random_words) * len(random_words)
+
+
+def get_room_name_from_id(room_id: int) -> str:
+    if not 0 <= room_id < ROOM_ID_LIMIT:
+        raise ValueError(f"Oops! {room_id} is not a room id.")
+    first, second = divmod(room_id, len(random_words))
+    return f"{random_words[first]} {random_words[second]}"
+
+
 brief_funny_waiting_messages = [
     "waiting…",
     "still waiting…",
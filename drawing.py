@@ -1,8 +1,196 @@
 import math
 from .torch import LEDManager
 
+CALL = 0
+SET = 1
+
+
+class Param:
+    """
+    A number supplied when a `DisplayList` is played: `values[slot] * scale +
+    bias`. Adding, subtracting, multiplying or dividing by a plain number
+    gives another Param, so drawing code can do its usual arithmetic on it
+    while recording. Keep the Param on the left (`offset * 0.5 + 20`):
+    reflected operators are optional in MicroPython.
+    """
+
+    def __init__(self, slot: int = 0, scale: float = 1.0, bias: float = 0.0):
+        self.slot = slot
+        self.scale = scale
+        self.bias = bias
+
+    def resolve(self, values) -> float:
+        return values[self.slot] * self.scale + self.bias
+
+    def __add__(self, other: float) -> "Param":
+        return Param(self.slot, self.scale, self.bias + other)
+
+    __radd__ = __add__
+
+    def __sub__(self, other: float) -> "Param":
+        return Param(self.slot, self.scale, self.bias - other)
+
+    def __rsub__(self, other: float) -> "Param":
+        return Param(self.slot, -self.scale, other - self.bias)
+
+    def __mul__(self, other: float) -> "Param":
+        return Param(self.slot, self.scale * other, self.bias * other)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other: float) -> "Param":
+        return Param(self.slot, self.scale / other, self.bias / other)
+
+    def __neg__(self) -> "Param":
+        return Param(self.slot, -self.scale, -self.bias)
+
+
+class DisplayList:
+    """
+    A recorded sequence of ctx calls. `play` replays them onto a ctx,
+    substituting `values` for any top-level `Param` arguments; everything
+    else was worked out once when the list was recorded.
+    """
+
+    def __init__(self):
+        # (CALL or SET, name, args, [(arg index, Param)])
+        self.ops: list[tuple[int, str, tuple, list]] = []
+        self.ctx = None
+        self.methods: list = []
+
+    def __len__(self) -> int:
+        return len(self.ops)
+
+    def bind(self, ctx) -> None:
+        """Look up the ctx's methods once rather than on every play."""
+        self.ctx = ctx
+        self.methods = [
+            getattr(ctx, name) if kind == CALL else None
+            for kind, name, _, _ in self.ops
+        ]
+
+    def play(self, ctx, values=()) -> None:
+        if ctx is not self.ctx:
+            self.bind(ctx)
+        methods = self.methods
+        for i, (kind, name, args, patches) in enumerate(self.ops):
+            if patches:
+                args = list(args)
+                for index, param in patches:
+                    args[index] = param.resolve(values)
+            if kind == CALL:
+                methods[i](*args)
+            else:
+                setattr(ctx, name, args[0])
+
+
+class Recorder:
+    """Stands in for the ctx while a scene is recorded into a `DisplayList`."""
+
+    def __init__(self, ctx):
+        self.ctx = ctx
+        self.display_list = DisplayList()
+
+    def add(self, kind: int, name: str, args: tuple) -> "Recorder":
+        patches = [(i, arg) for i, arg in enumerate(args) if isinstance(arg, Param)]
+        self.display_list.ops.append((kind, name, args, patches))
+        return self
+
+    def __getattr__(self, name: str):
+        if name.isupper():
+            # constants such as ctx.CENTER
+            return getattr(self.ctx, name)
+
+        def call(*args):
+            return self.add(CALL, name, args)
+
+        return call
+
+    def set(self, name: str, value) -> None:
+        self.add(SET, name, (value,))
+
+    font_size = property(None, lambda self, v: self.set("font_size", v))
+    text_align = property(None, lambda self, v: self.set("text_align", v))
+    text_baseline = property(None, lambda self, v: self.set("text_baseline", v))
+    line_width = property(None, lambda self, v: self.set("line_width", v))
+    global_alpha = property(None, lambda self, v: self.set("global_alpha", v))
+
+
+class LRUCache:
+    """
+    A small memo table holding at most `capacity` entries; the least
+    recently used entry is evicted to make room for a new one.
+    """
+
+    def __init__(self, capacity: int = 16):
+        self.capacity = capacity
+        self.entries: dict = {}  # key -> [value, last used]
+        self.clock = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key, compute):
+        """The cached value for `key`, calling `compute(*key)` on a miss."""
+        self.clock += 1
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            entry[1] = self.clock
+            return entry[0]
+        self.misses += 1
+        if len(self.entries) >= self.capacity:
+            oldest = min(self.entries, key=lambda k: self.entries[k][1])
+            del self.entries[oldest]
+        value = compute(*key)
+        self.entries[key] = [value, self.clock]
+        return value
+
+
+def triangle_offsets(size: float, rotate: float) -> tuple:
+    """Corner offsets (dx0, dy0, dx1, dy1, dx2, dy2) of a rotated triangle."""
+    cos_r = math.cos(rotate)
+    sin_r = math.sin(rotate)
+    offsets = []
+    # top-left, top-right and bottom-centre corners relative to the centre
+    for dx, dy in ((-size, size), (size, size), (0, -size)):
+        offsets.append(dx * cos_r - dy * sin_r)
+        offsets.append(dx * sin_r + dy * cos_r)
+    return tuple(offsets)
+
+
+def radial_stops(base_color: tuple, accent: tuple | None) -> tuple[tuple, tuple]:
+    """The two gradient stop colours `Drawing.draw_radial_box` fades between."""
+    if accent is None:
+        # default to a darker version of the base color
+        stop0 = tuple(float(max(0, c - 0.1)) for c in base_color)
+    else:
+        # ensure custom accent color is within bounds
+        stop0 = tuple(min(max(0, c), 1) for c in accent)
+
+    # stop1 must interpolate between stop0 and base_color
+    darker_base_color = tuple(float(max(0, c - 0.2)) for c in base_color)
+    stop1 = tuple((c0 + c1) / 2 for c0, c1 in zip(stop0, darker_base_color))
+    return stop0, stop1
+
+
+def record(ctx, draw, *args) -> DisplayList:
+    """
+    Record `draw(recorder, *args)` once. Pass `Param(n)` in `args` for the
+    values that change between frames and give them to `DisplayList.play`.
+    """
+    recorder = Recorder(ctx)
+    draw(recorder, *args)
+    return recorder.display_list
+
 
 class Drawing:
+    # shared by every Drawing: the screens draw the same few shapes
+    triangles: LRUCache = LRUCache(16)  # (size, rotate) -> corner offsets
+    stops: LRUCache = LRUCache(16)  # (base_color, accent) -> gradient stops
+
     def __init__(self):
         self.led_manager = LEDManager()
 
@@ -21,30 +209,16 @@ class Drawing:
         center to that point.
         """
         ctx.save()
-        # 1) Define the three corner offsets *relative* to the triangle’s center.
-        local_pts = [
-            (-size, size),  # top-left corner
-            (size, size),  # top-right corner
-            (0, -size),  # bottom-center
-        ]
-
-        cos_r = math.cos(rotate)
-        sin_r = math.sin(rotate)
+        # corner offsets relative to the centre, rotated; computed once per
+        # (size, rotate) and then just shifted to (x, y)
+        o = self.triangles.get((size, rotate), triangle_offsets)
 
-        # 2) Rotate each local point around (0,0) then shift it to (x,y)
-        world_pts = []
-        for dx, dy in local_pts:
-            # rotate around origin
-            rx = dx * cos_r - dy * sin_r
-            ry = dx * sin_r + dy * cos_r
-            # translate so that (0,0)→(x,y)
-            world_pts.append((rx + x, ry + y))
-
-        # 3) Build and stroke path
+        # build and stroke the path
         ctx.rgb(*colour).begin_path()
-        ctx.move_to(*world_pts[0])
-        ctx.line_to(*world_pts[1])
-        ctx.line_to(*world_pts[2])
+        # x, y first so either may be a Param
+        ctx.move_to(x + o[0], y + o[1])
+        ctx.line_to(x + o[2], y + o[3])
+        ctx.line_to(x + o[4], y + o[5])
         ctx.close_path()
         ctx.rgb(colour[0], colour[1], colour[2]).fill()
         ctx.stroke()
@@ -66,18 +240,7 @@ class Drawing:
         circle_size: radius of the inner circle
         box_size: half-width/height of the square
         """
-        # generate darker stops
-        stop0: tuple[float, float, float] | None = custom_accent_color
-        if stop0 is None:
-            # default to a darker version of the base color
-            stop0 = tuple(float(max(0, c - 0.1)) for c in base_color)
-        else:
-            # ensure custom accent color is within bounds
-            stop0 = tuple(min(max(0, c), 1) for c in stop0)
-
-        # stop1 must interpolate between stop0 and base_color
-        darker_base_color = tuple(float(max(0, c - 0.2)) for c in base_color)
-        stop1 = tuple((c0 + c1) / 2 for c0, c1 in zip(stop0, darker_base_color))
+        stop0, stop1 = self.stops.get((base_color, custom_accent_color), radial_stops)
 
         # radial gradient: from slightly outside circle back into it
         ctx.radial_gradient(0, 0, circle_size + 10, 0, 0, circle_size)
@@ -1,9 +1,16 @@
+from .framescheduler import FrameRate
+
+
 class Focusable:
+    # set whenever what draw() would show has changed; cleared once drawn
+    dirty: bool = True
+
     def __init__(self): ...
 
     def draw(self, ctx) -> None: ...
 
-    def handle_button(self, button: str) -> None: ...
+    def handle_button(self, button: str, pressed_us: int | None = None) -> None:
+        """`pressed_us` is the press's ticks_us timestamp, when known."""
 
     def update(self, delta: int) -> bool:
         return True
@@ -12,3 +19,20 @@ class Focusable:
         pass
 
     async def start(self) -> None: ...
+
+    def mark_dirty(self) -> None:
+        self.dirty = True
+
+    def needs_redraw(self) -> bool:
+        return self.dirty
+
+    def presented(self, ticks_us: int) -> None:
+        """Called by the app when the frame it last drew is on screen."""
+
+    def frame_rate(self) -> int:
+        """Frames per second this screen wants right now (`FrameRate`)."""
+        return FrameRate.NORMAL
+
+    def drawn(self) -> None:
+        """Called by the app once the current state has been drawn."""
+        self.dirty = False
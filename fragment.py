@@ -0,0 +1,124 @@
+import utime
+
+from . import protocol
+from .multiplayergame.room import MACAddress
+from .reliable import Delivery
+from .sendqueue import PRIORITY_NORMAL
+
+
+class PartialMessage:
+    chunks: list[bytes | None]
+    received: int = 0
+    started: int  # ticks_ms of the first fragment
+
+    def __init__(self, count: int, now: int):
+        self.chunks = [None] * count
+        self.started = now
+
+
+class Fragmentation:
+    """
+    Sends frames too large for one ESP-NOW frame as numbered fragments and
+    reassembles them on the other side.
+
+    The reassembly buffer holds at most `max_messages` partial messages; the
+    oldest is evicted to make room, and any message still incomplete after
+    `timeout_ms` is dropped. A completed message is handed to the `Comms`
+    routes exactly as if it had arrived in one piece.
+    """
+
+    timeout_ms: int = 2000
+    max_messages: int = 4
+
+    def __init__(self, comms):
+        self.comms = comms
+        self.msg_id = 0
+        self.partial: dict[tuple[MACAddress, int], PartialMessage] = {}
+        comms.on(protocol.OP_FRAGMENT, self.on_fragment)
+
+    def send(
+        self,
+        addr: MACAddress,
+        frame: bytes,
+        reliable: bool = True,
+        priority: int = PRIORITY_NORMAL,
+    ) -> list[Delivery]:
+        """
+        Send `frame`, fragmenting it only if it does not fit in one frame.
+        Returns one `Delivery` per frame sent when `reliable`.
+        """
+        frames = self.split(frame, reliable)
+        if not reliable:
+            for fragment in frames:
+                self.comms.post(addr, fragment, priority)
+            return []
+        return [
+            self.comms.reliable.send(addr, fragment, priority=priority)
+            for fragment in frames
+        ]
+
+    def send_many(
+        self,
+        addrs: list[MACAddress],
+        frame: bytes,
+        priority: int = PRIORITY_NORMAL,
+    ) -> list[Delivery]:
+        """
+        Reliably send `frame` to every peer in `addrs`, broadcasting each
+        fragment once; see `ReliableChannel.send_many`. Returns one `Delivery`
+        per peer per frame sent.
+        """
+        deliveries = []
+        for fragment in self.split(frame, True):
+            deliveries += self.comms.reliable.send_many(addrs, fragment, priority=priority)
+        return deliveries
+
+    def split(self, frame: bytes, reliable: bool) -> list[bytes]:
+        limit = protocol.MAX_FRAME_SIZE
+        if reliable:
+            limit -= protocol.RELIABLE_OVERHEAD
+        if len(frame) <= limit:
+            return [frame]
+        self.msg_id = (self.msg_id + 1) & 0xFF
+        return protocol.encode_fragments(
+            self.msg_id, frame, limit - protocol.FRAGMENT_OVERHEAD
+        )
+
+    def expire(self, now: int) -> None:
+        stale = [
+            key
+            for key, message in self.partial.items()
+            if utime.ticks_diff(now, message.started) > self.timeout_ms
+        ]
+        for key in stale:
+            print(f"Dropped incomplete message {key[1]} from {key[0].hex()}")
+            del self.partial[key]
+
+    def on_fragment(
+        self, mac: MACAddress, opcode: int, room_id: int, frame: bytes
+    ) -> None:
+        now = utime.ticks_ms()
+        self.expire(now)
+        msg_id, index, count, chunk = protocol.decode_fragment(frame)
+        if count > protocol.MAX_FRAGMENTS or index >= count:
+            return
+        key = (mac, msg_id)
+        message = self.partial.get(key)
+        if message is None or len(message.chunks) != count:
+            if len(self.partial) >= self.max_messages:
+                oldest = max(
+                    self.partial,
+                    key=lambda k: utime.ticks_diff(now, self.partial[k].started),
+                )
+                del self.partial[oldest]
+            message = self.partial[key] = PartialMessage(count, now)
+        if message.chunks[index] is None:
+            message.chunks[index] = chunk
+            message.received += 1
+        if message.received < count:
+            return
+        del self.partial[key]
+        whole = b"".join(message.chunks)  # type: ignore
+        header = protocol.decode_header(whole)
+        if header is not None:
+            self.comms.deliver((mac, header[0], header[1], whole))
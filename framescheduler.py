@@ -0,0 +1,52 @@
+import asyncio
+import utime
+
+
+class FrameRate:
+    IDLE = 5  # static screens: only input and the odd status change
+    NORMAL = 30  # animated screens
+    MAX = 0  # uncapped: the stimulus is (about to be) on screen
+
+
+# how long before the stimulus a game switches to FrameRate.MAX
+ARM_LEAD_MS = 250
+
+
+class FrameScheduler:
+    """
+    Paces the app loop to the focused screen's frame rate.
+
+    `wait` sleeps out whatever is left of the current frame at the requested
+    rate, so a static lobby costs a few frames a second while a game about to
+    show its stimulus yields straight back to the loop. A button press
+    (`wake`) ends the wait early so slow frame rates never delay input.
+    """
+
+    def __init__(self):
+        self.rate = FrameRate.NORMAL
+        self.frame_start = utime.ticks_ms()
+        self.woken = asyncio.Event()
+        self.switches = 0
+
+    def wake(self, *args) -> None:
+        self.woken.set()
+
+    async def wait(self, rate: int) -> None:
+        if rate != self.rate:
+            print(f"Frame rate {self.rate} -> {rate or 'max'}")
+            self.rate = rate
+            self.switches += 1
+        if rate == FrameRate.MAX:
+            await asyncio.sleep(0)
+        else:
+            elapsed = utime.ticks_diff(utime.ticks_ms(), self.frame_start)
+            remaining = 1000 // rate - elapsed
+            if remaining > 0 and not self.woken.is_set():
+                try:
+                    await asyncio.wait_for(self.woken.wait(), remaining / 1000)
+                except asyncio.TimeoutError:
+                    pass
+            else:
+                await asyncio.sleep(0)
+        self.woken.clear()
+        self.frame_start = utime.ticks_ms()
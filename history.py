@@ -0,0 +1,220 @@
+import asyncio
+import struct
+import time
+
+MODE_SINGLE = 0
+MODE_MULTI = 1
+MODES = 2
+
+DNF_MS = 0xFFFF  # as in protocol: "did not finish"
+
+HISTORY_PATH = "/reactz_history.bin"
+MAGIC = b"RZH"
+VERSION = 1
+
+# timestamp (u32, time.time()) | mode | rank | room id (u16) | reaction ms (u16)
+# | player count | reserved
+_RECORD_FORMAT = "<IBBHHBB"
+RECORD_SIZE = 12
+# magic | version | capacity | head | stored, then per mode: count, sum ms, best ms
+_HEADER_FORMAT = "<3sBHHH"
+_SUMMARY_FORMAT = "<IQH"
+_SUMMARY_SIZE = 14
+HEADER_SIZE = 10 + MODES * _SUMMARY_SIZE
+
+
+class GameHistory:
+    """
+    Every finished round, appended to a ring file of fixed-size records.
+
+    The file starts with a header holding the ring position and a running
+    summary (count, total and best per mode), so `best` and `average` never
+    read the log and `last` reads at most two contiguous runs of it. Once
+    `capacity` records are stored the oldest are overwritten; the summary
+    keeps counting.
+
+    The app calls `load` at start-up and `record` only packs into memory, so
+    the reaction and result path never touches the filesystem. Once a round's
+    board is on screen the game calls `flush_if_due`, which writes a batch
+    from a background task when `batch_size` records are pending (`flush`
+    writes them all, e.g. on leaving). With `path` set to None nothing
+    touches the filesystem at all.
+    """
+
+    max_bytes: int = 12 * 1024
+    batch_size: int = 8
+
+    def __init__(self, path: str | None = HISTORY_PATH):
+        self.path = path
+        self.capacity = (self.max_bytes - HEADER_SIZE) // RECORD_SIZE
+        self.loaded = False
+        self.head = 0  # next slot in the file
+        self.stored = 0  # records in the file, up to capacity
+        self.counts = [0] * MODES
+        self.sums = [0] * MODES
+        self.bests = [DNF_MS] * MODES
+        self.pending: list[bytes] = []
+        self.flushing = False
+
+    def load(self) -> None:
+        """
+        Read the header, or start a fresh file if there's none we understand.
+        Anything recorded before this is added to the stored summary.
+        """
+        if self.loaded:
+            return
+        self.loaded = True
+        if self.path is None:
+            return
+        try:
+            with open(self.path, "rb") as f:
+                header = f.read(HEADER_SIZE)
+        except OSError:
+            header = b""
+        if len(header) == HEADER_SIZE:
+            magic, version, capacity, head, stored = struct.unpack_from(
+                _HEADER_FORMAT, header, 0
+            )
+            if magic == MAGIC and version == VERSION and capacity == self.capacity:
+                self.head = head
+                self.stored = stored
+                for mode in range(MODES):
+                    count, total, best = struct.unpack_from(
+                        _SUMMARY_FORMAT, header, 10 + mode * _SUMMARY_SIZE
+                    )
+                    self.counts[mode] += count
+                    self.sums[mode] += total
+                    self.bests[mode] = min(self.bests[mode], best)
+                return
+            print(f"History file {self.path} is from another version, starting afresh")
+        try:
+            with open(self.path, "wb") as f:
+                f.write(self.header())
+        except OSError as e:
+            print(f"Can't write history to {self.path}: {e}")
+            self.path = None
+
+    def header(self) -> bytes:
+        header = bytearray(HEADER_SIZE)
+        struct.pack_into(
+            _HEADER_FORMAT, header, 0, MAGIC, VERSION, self.capacity, self.head, self.stored
+        )
+        for mode in range(MODES):
+            struct.pack_into(
+                _SUMMARY_FORMAT,
+                header,
+                10 + mode * _SUMMARY_SIZE,
+                self.counts[mode],
+                self.sums[mode],
+                self.bests[mode],
+            )
+        return bytes(header)
+
+    def record(
+        self,
+        mode: int,
+        reaction_ms: int,
+        room_id: int = 0,
+        rank: int = 1,
+        players: int = 1,
+    ) -> None:
+        """Note a finished round; `reaction_ms` is DNF_MS if the player didn't react."""
+        reaction_ms = min(max(reaction_ms, 0), DNF_MS)
+        self.pending.append(
+            struct.pack(
+                _RECORD_FORMAT,
+                int(time.time()) & 0xFFFFFFFF,
+                mode,
+                min(rank, 0xFF),
+                room_id & 0xFFFF,
+                reaction_ms,
+                min(players, 0xFF),
+                0,
+            )
+        )
+        if reaction_ms != DNF_MS:
+            self.counts[mode] += 1
+            self.sums[mode] += reaction_ms
+            if reaction_ms < self.bests[mode]:
+                self.bests[mode] = reaction_ms
+
+    def flush_if_due(self) -> None:
+        """Once a round's board is on screen: write a batch in the background if one is due."""
+        if len(self.pending) >= self.batch_size and not self.flushing:
+            self.flushing = True
+            asyncio.create_task(self.flush_later())
+
+    async def flush_later(self) -> None:
+        await asyncio.sleep(0)
+        self.flushing = False
+        self.flush()
+
+    def flush(self) -> None:
+        """Write pending records and the header."""
+        if not self.pending:
+            return
+        self.load()
+        pending = self.pending
+        self.pending = []
+        if self.path is None:
+            self.advance(len(pending))
+            return
+        try:
+            with open(self.path, "r+b") as f:
+                while pending:
+                    # one write per contiguous run up to the end of the ring
+                    run = pending[: self.capacity - self.head]
+                    pending = pending[len(run) :]
+                    f.seek(HEADER_SIZE + self.head * RECORD_SIZE)
+                    f.write(b"".join(run))
+                    self.advance(len(run))
+                f.seek(0)
+                f.write(self.header())
+        except OSError as e:
+            print(f"Can't write history to {self.path}: {e}")
+
+    def advance(self, count: int) -> None:
+        self.head = (self.head + count) % self.capacity
+        self.stored = min(self.stored + count, self.capacity)
+
+    def best(self, mode: int = MODE_SINGLE) -> int | None:
+        """Fastest reaction ever in `mode`, or None."""
+        self.load()
+        best = self.bests[mode]
+        return None if best == DNF_MS else best
+
+    def average(self, mode: int = MODE_SINGLE) -> int | None:
+        """Mean reaction ms over every finished round in `mode`, or None."""
+        self.load()
+        if not self.counts[mode]:
+            return None
+        return self.sums[mode] // self.counts[mode]
+
+    def last(self, n: int) -> list[tuple[int, int, int, int, int, int]]:
+        """
+        Up to `n` most recent rounds, newest first, as (timestamp, mode,
+        rank, room id, reaction ms, player count).
+        """
+        self.load()
+        records = self.pending[::-1][:n]
+        wanted = min(n - len(records), self.stored) if self.path else 0
+        if wanted > 0:
+            # the newest `wanted` slots before head, in at most two runs
+            start = (self.head - wanted) % self.capacity
+            runs = [(start, min(wanted, self.capacity - start))]
+            if runs[0][1] < wanted:
+                runs.append((0, wanted - runs[0][1]))
+            data = b""
+            try:
+                with open(self.path, "rb") as f:
+                    for slot, count in runs:
+                        f.seek(HEADER_SIZE + slot * RECORD_SIZE)
+                        data += f.read(count * RECORD_SIZE)
+            except OSError as e:
+                print(f"Can't read history from {self.path}: {e}")
+            for offset in range(len(data) - RECORD_SIZE, -1, -RECORD_SIZE):
+                records.append(data[offset : offset + RECORD_SIZE])
+        return [struct.unpack(_RECORD_FORMAT, r)[:6] for r in records]
+
+
+store = GameHistory()
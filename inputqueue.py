@@ -0,0 +1,37 @@
+import utime
+from events.input import BUTTON_TYPES, ButtonDownEvent
+from system.eventbus import eventbus
+
+from .messagequeue import MessageQueue
+
+
+class InputQueue:
+    """
+    Every button press, in order, stamped with `ticks_us` when the event bus
+    delivered it rather than when the app loop got round to it.
+
+    Items are `(button name, ticks_us)`, e.g. `("CONFIRM", 123456)`, so two
+    presses in one frame are both seen and a reaction is timed from the
+    press itself.
+    """
+
+    maxsize: int = 16
+
+    def __init__(self, app):
+        self.app = app
+        self.presses = MessageQueue(self.maxsize)
+        eventbus.on(ButtonDownEvent, self.on_button_down, app)
+
+    def on_button_down(self, event: ButtonDownEvent) -> None:
+        pressed_us = utime.ticks_us()
+        for name, button in BUTTON_TYPES.items():
+            if button in event.button:
+                self.presses.put((name, pressed_us))
+                return
+
+    def get_nowait(self) -> tuple[str, int] | None:
+        """The oldest unhandled press, or None."""
+        return self.presses.get_nowait()
+
+    def close(self) -> None:
+        eventbus.remove(ButtonDownEvent, self.on_button_down, self.app)
@@ -1,8 +1,9 @@
 import math
 from app_components import clear_background
 
+from . import animation
 from .focusable import Focusable
-from .drawing import Drawing
+from .drawing import DisplayList, Drawing, Param, record
 
 
 class GameType:
@@ -19,27 +20,33 @@ class MainMenu(Focusable):
     cleared_background: bool = False
 
     # breathing settings
-    breath_period: float = 4.0  # seconds per full in-and-out
+    breath_period_ms: int = 4000  # per full in-and-out
     breath_amplitude: float = 5.0  # max px offset up/down
-    _time: float = 0.0  # accumulated time
+    breath: animation.Curve
 
     text_vertical_offset: float = 0.0
+    scene: DisplayList | None = None
 
     def __init__(self):
-        pass
+        self.breath = animation.clock.curve(
+            "sine", self.breath_period_ms, self.breath_amplitude
+        )
 
     def draw(self, ctx):
         if not self.cleared_background:
             clear_background(ctx)
             self.cleared_background = True
 
-        # pull in our breathing offset
-        offset = self.text_vertical_offset
+        if self.scene is None:
+            # everything but the breathing offset is fixed: record it once
+            self.scene = record(ctx, self.draw_scene, Param(0))
+        self.scene.play(ctx, (self.text_vertical_offset,))
 
+    def draw_scene(self, ctx, offset) -> None:
         # background with a “floating” 3D look
         ctx.radial_gradient(
             0,
-            -offset * 0.1,  # start circle moves opposite to simulate light
+            offset * -0.1,  # start circle moves opposite to simulate light
             70,
             0,
             offset * 0.1,  # end circle moves with offset to shift shadow
@@ -61,12 +68,10 @@ class MainMenu(Focusable):
 
         # title
         ctx.font_size = 36
-        ctx.rgb(1, 1, 1).move_to(0, 0 + self.text_vertical_offset * 0.5).text("React")
+        ctx.rgb(1, 1, 1).move_to(0, offset * 0.5).text("React")
 
         ctx.font_size = 16
-        ctx.rgb(1, 1, 1).move_to(0, 20 + self.text_vertical_offset * 0.2).text(
-            "MULTIPLAYER"
-        )
+        ctx.rgb(1, 1, 1).move_to(0, offset * 0.2 + 20).text("MULTIPLAYER")
 
         ctx.font_size = 24
         ctx.rgb(1, 1, 1).move_to(0, 90).text("Singleplayer")
@@ -91,14 +96,11 @@ class MainMenu(Focusable):
     def update(self, delta: int) -> bool:
         """Delta is in milliseconds since last update."""
 
-        # advance our time accumulator in seconds
-        self._time += delta / 1000.0
-
-        # ω = 2π / period
-        omega = 2 * math.pi / self.breath_period
-
-        # sine wave gives ease-in-out; offset swings between –amplitude and +amplitude
-        self.text_vertical_offset = self.breath_amplitude * math.sin(omega * self._time)
+        # the shared animation clock has already advanced by delta; the sine
+        # offset swings between –amplitude and +amplitude
+        self.text_vertical_offset = self.breath.value
+        # the whole menu breathes, so every frame is different
+        self.mark_dirty()
 
         # return False to stay on this menu
         return False
@@ -0,0 +1,51 @@
+import asyncio
+
+
+class MessageQueue:
+    """
+    Bounded FIFO of received frames, filled by the `Comms` dispatcher.
+
+    MicroPython's asyncio has no Queue, so this is a list guarded by an Event.
+    When the queue is full the oldest item is dropped: for radio traffic the
+    newest frame is the one worth keeping.
+    """
+
+    maxsize: int
+    dropped: int = 0
+
+    def __init__(self, maxsize: int = 8):
+        self.maxsize = maxsize
+        self._items = []
+        self._event = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def put(self, item) -> None:
+        if len(self._items) >= self.maxsize:
+            self._items.pop(0)
+            self.dropped += 1
+        self._items.append(item)
+        self._event.set()
+
+    def get_nowait(self):
+        """Returns the oldest item, or None if the queue is empty."""
+        if not self._items:
+            return None
+        return self._items.pop(0)
+
+    async def get(self):
+        while not self._items:
+            self._event.clear()
+            await self._event.wait()
+        return self._items.pop(0)
+
+    def take_matching(self, predicate) -> list:
+        """Remove and return every queued item for which `predicate(item)` is true."""
+        matching = [item for item in self._items if predicate(item)]
+        if matching:
+            self._items = [item for item in self._items if not predicate(item)]
+        return matching
+
+    def clear(self) -> None:
+        self._items = []
@@ -0,0 +1,58 @@
+import random
+import utime
+
+
+class BeaconScheduler:
+    """
+    Decides how long the host waits between HOST beacons.
+
+    A new lobby beacons every `min_interval_ms` so nearby players find it
+    quickly; each beacon doubles the interval up to `max_interval_ms` while
+    the lobby is stable, and `reset` (a player joined) makes it fast again.
+    The interval is stretched by the channel load seen by `Comms`, failed
+    sends back it off further, and every wait gets random jitter so hosts in
+    range don't beacon in lockstep.
+    """
+
+    min_interval_ms: int = 250
+    max_interval_ms: int = 3000
+    backoff: int = 2
+    jitter: float = 0.25  # ± fraction of the interval
+    busy_frames_per_s: int = 30  # channel load at which the interval doubles
+
+    def __init__(self, comms):
+        self.comms = comms
+        self.interval_ms = self.min_interval_ms
+        self.load = 0.0  # smoothed frames/s heard on the channel
+        self.last_frames = comms.frames_heard
+        self.last_failures = comms.outbox.failures
+        self.last_ticks = utime.ticks_ms()
+
+    def reset(self) -> None:
+        """Something changed in the lobby: beacon fast again."""
+        self.interval_ms = self.min_interval_ms
+
+    def back_off(self) -> None:
+        self.interval_ms = min(self.max_interval_ms, self.interval_ms * self.backoff)
+
+    def measure_load(self) -> float:
+        now = utime.ticks_ms()
+        elapsed = utime.ticks_diff(now, self.last_ticks)
+        if elapsed > 0:
+            frames = self.comms.frames_heard - self.last_frames
+            self.load = (self.load + frames * 1000 / elapsed) / 2
+            self.last_frames = self.comms.frames_heard
+            self.last_ticks = now
+        return self.load
+
+    def next_interval_ms(self) -> int:
+        """Wait before the next beacon; call once per beacon sent."""
+        if self.comms.outbox.failures != self.last_failures:
+            # e.g. -12393, no peers available: the channel is struggling
+            self.last_failures = self.comms.outbox.failures
+            self.back_off()
+        interval = self.interval_ms * (1 + self.measure_load() / self.busy_frames_per_s)
+        # under heavy load allow up to twice the normal maximum
+        interval = min(interval, 2 * self.max_interval_ms)
+        self.back_off()
+        return int(interval * (1 + self.jitter * (2 * random.random() - 1)))
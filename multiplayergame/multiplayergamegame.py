@@ -4,17 +4,31 @@ import utime
 import asyncio
 from app_components import clear_background
 
+from .. import history, protocol
 from ..comms import Comms
-from ..drawing import Drawing
+from ..drawing import DisplayList, Drawing, record
 from ..focusable import Focusable
+from ..framescheduler import ARM_LEAD_MS, FrameRate
+from ..reactionstats import ReactionStats
 from .room import Room
+from .roundaggregator import RoundAggregator
+from .tournament import Tournament, TournamentFormat
+
+
+SESSION_ROWS = 5  # as many as fit on the round screen
 
 
 class MultiPlayerReactionGameGame(Focusable):
     drawing: Drawing = Drawing()
     random_delay_ms: int
     react_set: bool = False
-    start_ts: int
+    start_ts: int  # ticks_us the stimulus reached the screen
+    due_us: int = 0  # ticks_us the stimulus was due (the sleep returned)
+    onset_pending: bool = False  # stimulus due but not yet on screen
+    stimulus_drawn: bool = False  # ...and the last draw included it
+    onset_lag_us: int = 0  # last due-to-on-screen delay
+    start_received: int = 0  # ticks_ms START arrived (clients)
+    onset_ms: int = 0  # ticks_ms the stimulus reached the screen
     reacted_in: str | None
     cleared_background: bool
     comms: Comms
@@ -22,44 +36,129 @@ class MultiPlayerReactionGameGame(Focusable):
     multiplayer: bool
     is_host: bool
     results: dict[bytes, int]
+    scores: dict[bytes, tuple[int, int]]  # host's (corrected ms, ± ms)
+    session: dict[bytes, ReactionStats]  # host: every player, across rounds
+    aggregator: RoundAggregator | None = None
+    round_task: asyncio.Task | None = None
+    tournament: Tournament | None = None  # host: running a tournament
+    next_task: asyncio.Task | None = None  # the next round, started early
+    round_no: int = protocol.STANDALONE_ROUND  # from the latest START
+    live_round: int = protocol.STANDALONE_ROUND  # ...whose stimulus was last due
+    awaiting: list[int]  # client: rounds whose RESULT we still want
+    scene: DisplayList | None = None
+    arm_at: int | None = None  # ticks_ms to switch to the max frame rate
+    history_due: bool = False  # a board was recorded; flush once it's on screen
+    showing_session: bool = False  # host: the session leaderboard, not the round's board
     start_ts = 0
     cleared_background = False
     waiting_for_host_to_start = True
 
     async def listen_for_scores(self) -> None:
+        """Client: wait for the host's final RESULT for every round in `awaiting`"""
         print("Listening for scores...")
-        incoming = await self.comms.receive_scores()
-        if incoming:
-            print("Received scores from host or players.")
-            sender, msg = incoming
-            parts = msg.split()
-            tag = parts[0]
-            print(tag, parts)
-            if tag == "TIME" and self.is_host:
-                print(f"Received TIME from {sender.hex()}: {parts[3]}")
-                # Host collects everyone’s TIME
-                t = int(parts[3])
-                self.results[sender] = t
-                # once everyone (host + players) have sent
-                expected = len(self.room.players) + 1
-                if len(self.results) == expected:
-                    # broadcast final scoreboard
-                    self.comms.send_results(self.room, self.results)
-
-            elif tag == "RESULT" and not self.is_host:
-                # Client receives final RESULTS
-                raw = parts[3]
-                for pair in raw.split(","):
-                    mac_hex, tstr = pair.split(":")
-                    self.results[bytes.fromhex(mac_hex)] = int(tstr)
-        else:
-            print("No scores received")
+        while self.awaiting:
+            sender, opcode, frame = await self.comms.receive_scores(self.room)
+            if opcode != protocol.OP_RESULT or sender != self.room.host_mac:
+                continue
+            round_no = protocol.decode_result_round(frame)
+            if round_no not in self.awaiting:
+                print(f"Ignoring RESULT for round {round_no}")
+                continue
+            self.awaiting.remove(round_no)
+            results = protocol.decode_result(frame)
+            scores = protocol.decode_scores(frame)
+            self.record_history(results, scores)
+            if round_no == self.live_round:
+                # only the latest round's board; a late one is just history
+                self.results.update(results)
+                self.scores.update(scores)
+                self.mark_dirty()
+
+    def on_standings(self, results: dict[bytes, int]) -> None:
+        """Host: partial (and finally complete) standings from the aggregator"""
+        self.results = results
+        if self.aggregator:
+            self.scores = self.aggregator.scores
+            if self.aggregator.finalised:
+                self.record_history()
+                self.update_session()
+                if self.tournament:
+                    self.next_tournament_round()
+        self.mark_dirty()
+
+    def next_tournament_round(self) -> None:
+        """Host: score the round just finalised and, unless that was the last, START the next."""
+        assert self.tournament is not None
+        ranked = sorted(
+            ((mac, score[0]) for mac, score in self.results_with_scores()),
+            key=lambda result: result[1],
+        )
+        self.tournament.record(ranked)
+        if self.tournament.finished:
+            champion = self.tournament.champion
+            print(f"Tournament over, won by {champion.hex() if champion else 'nobody'}")
+            return
+        # pipelined: the next START goes out while this RESULT is still being
+        # delivered, and this board stays up through the next random wait
+        self.next_task = asyncio.create_task(self.start(pipelined=True))
+
+    def results_with_scores(self) -> list[tuple[bytes, tuple[int, int]]]:
+        """Each result as (mac, (corrected ms, ± ms)), as measured if uncorrected."""
+        return [
+            (mac, self.scores.get(mac, (t, 0))) for mac, t in self.results.items()
+        ]
+
+    def record_history(
+        self,
+        results: dict[bytes, int] | None = None,
+        scores: dict[bytes, tuple[int, int]] | None = None,
+    ) -> None:
+        """Note our corrected time and rank from a final board (by default, ours)."""
+        if results is None:
+            results, scores = self.results, self.scores
+        ranked = sorted(
+            ((mac, scores.get(mac, (t, 0)) if scores else (t, 0)) for mac, t in results.items()),
+            key=lambda result: result[1][0],
+        )
+        for rank, (mac, (t, _)) in enumerate(ranked, 1):
+            if mac == self.comms.mac:
+                history.store.record(
+                    history.MODE_MULTI, t, self.room.room_id, rank, len(ranked)
+                )
+                self.history_due = True
+                return
+
+    def update_session(self) -> None:
+        """Host: fold the final board into each player's session stats."""
+        for mac, (t, _) in self.results_with_scores():
+            if t == protocol.DNF_MS:
+                continue
+            stats = self.session.get(mac)
+            if stats is None:
+                stats = self.session[mac] = ReactionStats()
+            stats.add(t)
+
+    def session_leaderboard(self) -> list[tuple[bytes, ReactionStats]]:
+        """Host: players by median reaction over the session, fastest first."""
+        return sorted(self.session.items(), key=lambda entry: entry[1].p50.value)
+
+    def cancel_round(self) -> None:
+        if self.next_task:
+            self.next_task.cancel()
+            self.next_task = None
+        if self.round_task:
+            self.round_task.cancel()
+            self.round_task = None
+        if self.aggregator:
+            self.aggregator.cancel()
+            self.aggregator = None
 
     def __init__(
         self,
         comms: Comms,
         room: Room,
         is_host: bool = False,
+        tournament: Tournament | None = None,
     ):
         self.comms = comms
         self.room = room
@@ -69,27 +168,60 @@ class MultiPlayerReactionGameGame(Focusable):
             raise ValueError("Cannot be host without a multiplayer setup.")
 
         self.is_host = is_host
+        if tournament and not is_host:
+            raise ValueError("Only the host runs a tournament.")
+        self.tournament = tournament
+        self.awaiting = []
         self.results = {}
+        self.scores = {}
+        self.session = {}
         self.reacted_in = None
         self.react_set = False
         self.start_ts = 0
         self.cleared_background = False
+        # pre-armed: the stimulus frame is recorded long before it's due
+        self.stimulus = record(None, self.draw_stimulus)
 
-    def handle_button(self, button: str) -> None:
+    def handle_button(self, button: str, pressed_us: int | None = None) -> None:
+        if button == "UP" and self.is_host and self.session:
+            # between rounds, flip between the round's board and the session's
+            self.showing_session = not self.showing_session
+            self.mark_dirty()
         if button in ["CONFIRM", "RIGHT", "DOWN"]:
             print(f"Button {button} pressed in game. reacted_in is {self.reacted_in}")
             if self.reacted_in is None:
-                self.on_reaction()
+                self.on_reaction(pressed_us)
+            elif self.tournament or self.live_round != protocol.STANDALONE_ROUND:
+                print("Tournament rounds follow on by themselves")
             elif self.reacted_in:
                 # reset game
                 print("Reaction not set yet! Resetting game.")
                 self.restart()
 
-    async def start(self):
-        self.results.clear()
-        self.waiting_for_host_to_start = True
-        self.reacted_in = None
-        self.cleared_background = False
+    async def start(self, pipelined: bool = False):
+        """
+        Play a round. `pipelined` rounds (tournaments) start while the last
+        one is still live or its board is on screen, which stays up until
+        this round's stimulus is due.
+        """
+        if not pipelined:
+            if self.aggregator and not self.aggregator.finalised:
+                # finalise the open round rather than drop it: whoever reacted
+                # still gets a board (the rest DNF), and in a tournament the
+                # round is scored and the next one STARTs from on_standings
+                self.aggregator.finalise()
+                if self.tournament:
+                    return
+            self.cancel_round()
+            self.awaiting = []
+            self.results = {}
+            self.scores = {}
+            self.waiting_for_host_to_start = True
+            self.reacted_in = None
+            self.cleared_background = False
+            self.arm_at = None
+            self.onset_pending = False
+            self.mark_dirty()
 
         if self.multiplayer:
             print(
@@ -97,39 +229,76 @@ class MultiPlayerReactionGameGame(Focusable):
             )
             if self.is_host:
                 # Host picks & broadcasts delay
+                if self.tournament:
+                    round_no = self.tournament.next_round()
+                else:
+                    round_no = protocol.STANDALONE_ROUND
                 self.random_delay_ms = random.randint(1000, 5000)
-                asyncio.create_task(self.listen_for_scores())
-                await self.comms.send_react_start(self.room, self.random_delay_ms)
-                print(f"Host set random delay: {self.random_delay_ms}ms")
-                await asyncio.sleep(self.random_delay_ms / 1000)
+                self.aggregator = RoundAggregator(
+                    self.comms, self.room, on_update=self.on_standings, round_no=round_no
+                )
+                target = self.comms.send_react_start(
+                    self.room, self.random_delay_ms, round_no
+                )
+                self.aggregator.expect(target, self.random_delay_ms)
+                self.round_no = round_no
+                start_received = 0
+                print(f"Host set random delay: {self.random_delay_ms}ms for round {round_no}")
+                self.round_task = asyncio.create_task(
+                    self.aggregator.collect(
+                        utime.ticks_add(target, self.aggregator.reaction_window_ms)
+                    )
+                )
             else:
-                # Client waits for host START
-                incoming = await self.comms.receive_react(room=self.room)
-                if incoming:
+                if not pipelined:
+                    # Client syncs its clock with the host while it waits for START
+                    asyncio.create_task(self.comms.clock.sync(self.room.host_mac))
+                started = await self.comms.receive_react(room=self.room)
+                start_received = utime.ticks_ms()
+                if (
+                    started is not None
+                    and started[1] == self.round_no
+                    and self.round_no != protocol.STANDALONE_ROUND
+                ):
+                    print(f"Ignoring repeated START for round {started[1]}")
+                    self.next_task = asyncio.create_task(self.start(pipelined))
+                    return
+                if started is not None:
+                    target, self.round_no = started
                     self.waiting_for_host_to_start = False
+                    self.awaiting.append(self.round_no)
+                    if self.round_task is None or self.round_task.done():
+                        self.round_task = asyncio.create_task(self.listen_for_scores())
+                    self.random_delay_ms = utime.ticks_diff(target, utime.ticks_ms())
                     print(
-                        f"Received REACT START from host in {self.room.name} with time {incoming}ms"
+                        f"Received REACT START from host in {self.room.name}, go in {self.random_delay_ms}ms"
                     )
-                    self.random_delay_ms = incoming
-                    self.cleared_background = False
-                    await asyncio.sleep(self.random_delay_ms / 1000)
+                    if not pipelined:
+                        self.cleared_background = False
+                        self.mark_dirty()
                 else:
                     print(
                         f"Failed to receive START from host in room {self.room.name}. Restarting game."
                     )
                     self.restart()
                     return
-            # mark go-time
-            self.start_ts = utime.ticks_ms()
-            self.react_set = True
+            self.arm_at = utime.ticks_add(target, -ARM_LEAD_MS)
+            # sleep until the shared go-time (immediately if START arrived late)
+            await asyncio.sleep(
+                max(0, utime.ticks_diff(target, utime.ticks_ms())) / 1000
+            )
+            # go-time; the clock starts when the frame showing it is presented
+            self.stimulus_due(self.round_no, start_received)
 
         else:
             # … your existing single-player start() …
             assert not self.react_set
             self.random_delay_ms = random.randint(700, 1000)
+            self.arm_at = utime.ticks_add(
+                utime.ticks_ms(), self.random_delay_ms - ARM_LEAD_MS
+            )
             await asyncio.sleep(self.random_delay_ms / 1000)
-            self.start_ts = utime.ticks_ms()
-            self.react_set = True
+            self.stimulus_due()
 
     def restart(self):
         print("Restarting game...")
@@ -138,38 +307,155 @@ class MultiPlayerReactionGameGame(Focusable):
         self.react_set = False
         self.start_ts = 0
         self.random_delay_ms = 0
+        self.arm_at = None
+        self.onset_pending = False
+        self.stimulus_drawn = False
+        self.mark_dirty()
         asyncio.create_task(self.start())
 
-    def on_reaction(self):
-        now = utime.ticks_ms()
-        if not self.react_set:
+    def on_reaction(self, pressed_us: int | None = None):
+        """`pressed_us`: when the button went down, if earlier than now."""
+        if pressed_us is None:
+            pressed_us = utime.ticks_us()
+        if (
+            not self.react_set
+            or self.onset_pending
+            or utime.ticks_diff(pressed_us, self.start_ts) < 0
+        ):
+            # a press from before the stimulus was on screen, even if handled after
             print("Too soon!")
             return
-        elapsed = utime.ticks_diff(now, self.start_ts)
+        elapsed = utime.ticks_diff(pressed_us, self.start_ts) // 1000
         self.reacted_in = f"{elapsed}"
         self.react_set = False
+        self.mark_dirty()
 
         print(f"Reaction time: {self.reacted_in}ms")
 
         if self.multiplayer:
             if self.is_host:
                 # Host also records own time
-                self.results[self.comms.mac] = elapsed
+                if self.aggregator and self.aggregator.round_no == self.live_round:
+                    self.aggregator.record(self.comms.mac, elapsed)
             else:
-                # Client → host
-                self.comms.send_react_time(self.room, elapsed)
-                asyncio.create_task(self.listen_for_scores())
+                # Client → host, with when it all happened on our clock
+                now_us, now_ms = utime.ticks_us(), utime.ticks_ms()
+                pressed = utime.ticks_add(
+                    now_ms, -(utime.ticks_diff(now_us, pressed_us) // 1000)
+                )
+                self.comms.send_react_time(
+                    self.room,
+                    elapsed,
+                    self.start_received,
+                    self.onset_ms,
+                    pressed,
+                    self.live_round,
+                )
+
+    def stimulus_due(
+        self, round_no: int = protocol.STANDALONE_ROUND, start_received: int = 0
+    ) -> None:
+        self.live_round = round_no
+        self.start_received = start_received
+        self.showing_session = False
+        # a pipelined round's board stays up until now
+        self.results = {}
+        self.scores = {}
+        self.reacted_in = None
+        self.arm_at = None
+        self.due_us = utime.ticks_us()
+        self.onset_pending = True
+        self.stimulus_drawn = False
+        self.react_set = True
+        self.mark_dirty()
+        if round_no != protocol.STANDALONE_ROUND and not self.is_host:
+            # a tournament: be ready for the host's next START straight away
+            self.next_task = asyncio.create_task(self.start(pipelined=True))
+
+    def presented(self, ticks_us: int) -> None:
+        if self.history_due and self.results and not self.react_set:
+            # nothing is timed while the board is up, so the write can't skew a round
+            self.history_due = False
+            history.store.flush_if_due()
+        if self.onset_pending and self.stimulus_drawn:
+            self.start_ts = ticks_us
+            self.onset_ms = utime.ticks_ms()
+            self.onset_pending = False
+            self.onset_lag_us = utime.ticks_diff(ticks_us, self.due_us)
+            print(f"Stimulus on screen {self.onset_lag_us / 1000:.1f}ms after it was due")
 
     def update(self, delta: int) -> bool:
         return True
 
+    def frame_rate(self) -> int:
+        if self.react_set:
+            return FrameRate.MAX
+        if self.arm_at is not None:
+            if utime.ticks_diff(utime.ticks_ms(), self.arm_at) >= 0:
+                return FrameRate.MAX
+        return FrameRate.IDLE
+
+    def close(self) -> None:
+        self.cancel_round()
+
+    def mark_dirty(self) -> None:
+        self.dirty = True
+        self.scene = None
+
     def draw(self, ctx) -> None:
         if not self.cleared_background:
             clear_background(ctx)
             self.cleared_background = True
 
+        if self.react_set and not self.results:
+            self.stimulus.play(ctx)
+        else:
+            if self.scene is None:
+                # the screen only changes with the game's state (see mark_dirty)
+                self.scene = record(ctx, self.draw_scene)
+            self.scene.play(ctx)
+        if self.react_set and self.onset_pending:
+            self.stimulus_drawn = True
+
+    def round_label(self) -> str:
+        tournament = self.tournament
+        if tournament is None:
+            return f"round {self.live_round}"
+        if tournament.finished:
+            champion = tournament.champion
+            if champion is None:
+                return "no winner"
+            return f"winner: {'You' if champion == self.comms.mac else champion.hex()[6:]}"
+        if tournament.format == TournamentFormat.KNOCKOUT:
+            return f"round {tournament.round}, {len(tournament.contenders)} left"
+        return f"round {tournament.round} of {tournament.rounds}"
+
+    def draw_session(self, ctx) -> None:
+        """Host: the fastest players this session, by median reaction."""
+        leaders = self.session_leaderboard()[:SESSION_ROWS]
+        ctx.rgb(0.2, 0.2, 0.2).round_rectangle(
+            -80, -70, 160, 22 * len(leaders) + 40, 8
+        ).fill()
+        ctx.font_size = 18
+        ctx.rgb(1, 1, 1).move_to(0, -54).text("session, median")
+        y = -30
+        for place, (mac, stats) in enumerate(leaders, 1):
+            name = "You" if mac == self.comms.mac else mac.hex()[6:]
+            ctx.font_size = 20
+            ctx.rgb(1, 1, 1).move_to(0, y).text(
+                f"{place}. {name}: {stats.p50.value:.0f}ms"
+            )
+            y += 22
+
+    def draw_stimulus(self, ctx) -> None:
+        ctx.rgb(1, 0, 0).arc(0, 0, 60, 0, 2 * math.pi, True).fill()
+
+    def draw_scene(self, ctx) -> None:
+        if self.showing_session and not self.react_set:
+            self.draw_session(ctx)
+            return
         if self.react_set:
-            ctx.rgb(1, 0, 0).arc(0, 0, 60, 0, 2 * math.pi, True).fill()
+            self.draw_stimulus(ctx)
         else:
             if self.reacted_in is not None:
                 ctx.rgb(0, 0.6, 0).arc(0, 0, 60, 0, 2 * math.pi, True).fill()
@@ -177,6 +463,14 @@ class MultiPlayerReactionGameGame(Focusable):
             else:
                 ctx.rgb(0.5, 0, 0.5).arc(0, 0, 40, 0, 2 * math.pi, True).fill()
 
+        if self.tournament or self.live_round != protocol.STANDALONE_ROUND:
+            ctx.font_size = 18
+            ctx.rgb(1, 1, 1).move_to(0, -80).text(self.round_label())
+
+        if self.is_host and self.session and not self.react_set:
+            ctx.font_size = 16
+            ctx.rgb(1, 1, 1).move_to(0, -100).text("up: session")
+
         if self.multiplayer and self.results:
             y = 38
             height_of_box = 22 * len(self.results) + 10
@@ -189,10 +483,19 @@ class MultiPlayerReactionGameGame(Focusable):
                 8,
             ).fill()
 
-            for mac, t in self.results.items():
+            # ranked by the host's corrected times
+            for mac, (t, bound) in sorted(
+                self.results_with_scores(), key=lambda result: result[1][0]
+            ):
                 prefix = "You" if mac == self.comms.mac else mac.hex()[6:]
                 ctx.font_size = 20
-                ctx.rgb(1, 1, 1).move_to(0, y).text(f"{prefix}: {t}ms")
+                if t == protocol.DNF_MS:
+                    score = "DNF"
+                elif bound:
+                    score = f"{t}±{bound}ms"
+                else:
+                    score = f"{t}ms"
+                ctx.rgb(1, 1, 1).move_to(0, y).text(f"{prefix}: {score}")
                 y += 22
 
         elif self.waiting_for_host_to_start and not self.is_host:
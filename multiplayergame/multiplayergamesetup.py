@@ -4,12 +4,17 @@ import asyncio
 from app_components import clear_background
 
 from ..comms import Comms
-from ..drawing import Drawing
+from ..drawing import DisplayList, Drawing, Param, record
 from ..mainmenu import GameType
+from .. import animation
 from ..constants import get_random_waiting_message, get_room_name
 from ..focusable import Focusable
+from ..framescheduler import FrameRate
 from .multiplayergamegame import MultiPlayerReactionGameGame
+from .beaconscheduler import BeaconScheduler
 from .room import Room
+from .roomdirectory import RoomDirectory
+from .tournament import Tournament, TournamentFormat
 
 
 class MultiPlayerReactionGameSetup(Focusable):
@@ -19,23 +24,32 @@ class MultiPlayerReactionGameSetup(Focusable):
     total_delta: int = 0
     drawing: Drawing = Drawing()
     joining_task: asyncio.Task | None = None
+    accepting_task: asyncio.Task | None = None
     listening_for_rooms: bool = False
     cleared_background: bool = False
     accent: tuple[float, float, float] | None = None
     color_override: tuple[float, float, float] | None = None
     subtitle: str | None = None
     game: MultiPlayerReactionGameGame | None = None
+    directory: RoomDirectory | None = None
+    beacon: BeaconScheduler | None = None
+    scene: DisplayList | None = None
+    tournament_format: str = TournamentFormat.ROUNDS
+    tournament_rounds: int = 5
 
     room: Room | None = None
 
     # breathing settings
-    breath_period: float = 4.0  # seconds per full in-and-out
+    breath_period_ms: int = 4000  # per full in-and-out
     breath_amplitude: float = 3.0  # max px offset up/down
-    _time: float = 0.0  # accumulated time
+    breath: animation.Curve
     breath_offset: float = 0.0
 
     def __init__(self, gameType: str):
         self.gameType = gameType
+        self.breath = animation.clock.curve(
+            "sine", self.breath_period_ms, self.breath_amplitude
+        )
         if gameType == GameType.HOSTING:
             room_name = get_room_name()
             self.room = Room(name=room_name, host_mac=b"")
@@ -47,96 +61,152 @@ class MultiPlayerReactionGameSetup(Focusable):
         asyncio.create_task(self.reset_comms())
 
     async def reset_comms(self) -> None:
+        if hasattr(self, "comms"):
+            # only one dispatcher may own the radio
+            self.comms.close()
         self.comms = Comms()
 
-    def handle_button(self, button: str) -> None:
+    def handle_button(self, button: str, pressed_us: int | None = None) -> None:
         print(f"Button pressed: {button}")
         if self.gameType == GameType.PLAYINGMULTIPLAYER:
             if self.game:
-                self.game.handle_button(button)
+                self.game.handle_button(button, pressed_us)
             return
         if button == "DOWN" and self.gameType == GameType.JOINING:
             if self.room:
                 asyncio.create_task(self.join_room())
+        elif button == "RIGHT" and self.gameType == GameType.JOINING:
+            self.page_rooms(1)
+        elif button == "UP" and self.gameType == GameType.JOINING:
+            self.page_rooms(-1)
         elif button == "DOWN" and self.gameType == GameType.HOSTING:
             if self.room and len(self.room.players) > 0:
-                if self.joining_task:
-                    # Cancel the task that is advertising the room
-                    print("Cancelling joining task")
-                    self.joining_task.cancel()
-                self.joining_task = None
+                # Stop advertising the room and accepting players
+                print("Cancelling joining task")
+                self.stop_lobby_tasks()
                 self.start_multiplayer_game_as_host()
-
-    async def start(self):
+        elif button == "UP" and self.gameType == GameType.HOSTING:
+            if self.room and len(self.room.players) > 0:
+                self.stop_lobby_tasks()
+                self.start_multiplayer_game_as_host(
+                    Tournament(
+                        [self.comms.mac] + list(self.room.players),
+                        self.tournament_format,
+                        self.tournament_rounds,
+                    )
+                )
+        elif button == "RIGHT" and self.gameType == GameType.HOSTING:
+            formats = TournamentFormat.ALL
+            self.tournament_format = formats[
+                (formats.index(self.tournament_format) + 1) % len(formats)
+            ]
+            self.mark_dirty()
+
+    def stop_lobby_tasks(self) -> None:
         if self.joining_task:
             self.joining_task.cancel()
+            self.joining_task = None
+        if self.accepting_task:
+            self.accepting_task.cancel()
+            self.accepting_task = None
+
+    async def start(self):
+        self.stop_lobby_tasks()
         print("start called")
         asyncio.create_task(self.reset_comms())
         await asyncio.sleep(1)
         if self.gameType == GameType.HOSTING:
             self.joining_task = asyncio.create_task(self.advertise_room())
+            self.accepting_task = asyncio.create_task(self.accept_joins())
         elif self.gameType == GameType.JOINING:
-            self.joining_task = None
-            # self.broadcast_task = asyncio.create_task(self.comms.broadcast("JOIN"))
-            await self.listen_for_rooms()
-            # self.joining_task = asyncio.create_task(self.listen_for_rooms())
+            print("Listening for rooms...")
+            self.directory = RoomDirectory(on_change=self.on_rooms_changed)
+            self.joining_task = asyncio.create_task(self.directory.run(self.comms))
 
-    def start_multiplayer_game_as_host(self) -> None:
+    def start_multiplayer_game_as_host(self, tournament: Tournament | None = None) -> None:
         assert self.room is not None, "Room must be initialized before starting game"
         print("Starting game with players:", self.room.players)
+        if tournament:
+            print(f"...as a {tournament.format} tournament of {tournament.rounds} rounds")
         self.gameType = GameType.PLAYINGMULTIPLAYER
         self.game = MultiPlayerReactionGameGame(
             comms=self.comms,
             room=self.room,
             is_host=True,
+            tournament=tournament,
         )
+        self.mark_dirty()
         asyncio.create_task(self.game.start())
 
     async def advertise_room(self) -> None:
         assert self.room is not None, "Room must be initialized before advertising"
         print(f"Advertising room: {self.room.name}")
+        self.beacon = BeaconScheduler(self.comms)
+        while True:
+            try:
+                self.comms.advertise(self.room)
+                await asyncio.sleep(self.beacon.next_interval_ms() / 1000)
+            except asyncio.CancelledError:
+                print("Advertise room cancelled")
+                raise
+
+    async def accept_joins(self) -> None:
+        """Acknowledge JOINs as they arrive, independent of the HOST beacon."""
+        assert self.room is not None, "Room must be initialized before accepting"
         while True:
             try:
-                await self.comms.broadcast(
-                    f"HOST {self.room.name}",
-                    broadcast_async=False,
-                )
                 await self.comms.receive_join_requests(
+                    self.room,
                     self.add_player_to_room,
                 )
             except asyncio.CancelledError:
-                print("Advertise room cancelled")
+                print("Accepting joins cancelled")
                 raise
-            except OSError as e:
-                if e.args[0] == -12393:
-                    print("No peers available, retrying...")
-            await asyncio.sleep(3)
-
-    async def listen_for_rooms(self) -> None:
-        print("Listening for rooms...")
-        no_message_received = True
-        while no_message_received:
-            receive = await self.comms.receive()
-            if receive:
-                host, msg = receive
-                no_message_received = False
-                print(f"Received message from {host}: {msg}")
-            await asyncio.sleep(1)
-        if msg and msg.startswith("HOST "):
-            room_name = msg[5:]  # Extract room name after "HOST "
-            print(f"Found room: {room_name} from {host}")
-            self.searching_message = "Found room!"
-            self.room = Room(name=room_name, host_mac=host)
+            except ValueError as e:
+                print(f"Failed to acknowledge JOIN: {e}")
+
+    def on_rooms_changed(self) -> None:
+        """Keep the selected room (by host) while the directory reorders."""
+        assert self.directory is not None
+        index = self.directory.position(self.room.host_mac) if self.room else -1
+        if index < 0:
+            index = 0
+        self.select_room(index)
+
+    def page_rooms(self, step: int) -> None:
+        if not self.directory or not self.room:
+            return
+        index = self.directory.position(self.room.host_mac) + step
+        self.select_room(index % len(self.directory))
+
+    def select_room(self, index: int) -> None:
+        assert self.directory is not None
+        self.mark_dirty()
+        if index >= len(self.directory):
+            self.room = None
+            self.searching_message = "searching for rooms…"
+            self.waiting_message = "Searching…"
+            self.accent = None
+            self.color_override = None
+            return
 
-            self.waiting_message = room_name
-            if "banana" in self.room.name:
-                self.accent = (1, 1, 0)
-            if self.room.name == "banana banana":
-                self.color_override = (0.9, 0.9, 0)
+        self.room = self.directory.view[index].room
+        if len(self.directory) == 1:
+            self.searching_message = "Found room!"
+        else:
+            self.searching_message = f"room {index + 1} of {len(self.directory)}"
+        self.waiting_message = self.room.name
+        self.accent = (1, 1, 0) if "banana" in self.room.name else None
+        if self.room.name == "banana banana":
+            self.color_override = (0.9, 0.9, 0)
+        else:
+            self.color_override = None
 
     async def join_room(self) -> None:
         assert self.room is not None, "Room must be initialized before joining"
         print(f"Joining room: {self.room.name}")
+        # stop discovery so the room can't change under us
+        self.stop_lobby_tasks()
         await self.comms.join_room(self.room, self.on_joined)
         # self.gameType = GameType.PLAYINGMULTIPLAYER
 
@@ -149,20 +219,51 @@ class MultiPlayerReactionGameSetup(Focusable):
             room=self.room,
             is_host=False,
         )
+        self.mark_dirty()
         asyncio.create_task(self.game.start())
 
     def add_player_to_room(self, player_mac: bytes) -> None:
         if self.room:
             print(f"Adding player {player_mac.hex()} to room {self.room.name}")
             self.room.add_player(player_mac)
+            if self.beacon:
+                # the lobby is filling up, others may be looking for it too
+                self.beacon.reset()
+            self.mark_dirty()
             self.subtitle = f"{len(self.room.players)} player{'' if len(self.room.players) == 1 else 's'} joined"
         else:
             print("No room to add player to!")
 
+    def mark_dirty(self) -> None:
+        self.dirty = True
+        self.scene = None
+
+    def frame_rate(self) -> int:
+        if self.gameType == GameType.PLAYINGMULTIPLAYER and self.game:
+            return self.game.frame_rate()
+        # only lobbies with a room breathe; the search screen is static
+        return FrameRate.NORMAL if self.room else FrameRate.IDLE
+
+    def presented(self, ticks_us: int) -> None:
+        if self.game:
+            self.game.presented(ticks_us)
+
+    def needs_redraw(self) -> bool:
+        if self.gameType == GameType.PLAYINGMULTIPLAYER and self.game:
+            return self.dirty or self.game.needs_redraw()
+        return self.dirty
+
+    def drawn(self) -> None:
+        self.dirty = False
+        if self.game:
+            self.game.drawn()
+
     def close(self) -> None:
-        if self.joining_task:
-            self.joining_task.cancel()
-            self.joining_task = None
+        self.stop_lobby_tasks()
+        if self.game:
+            self.game.close()
+        if hasattr(self, "comms"):
+            self.comms.close()
         print("Cancelled multiplayer game")
 
     def on_reaction(self):
@@ -188,7 +289,13 @@ class MultiPlayerReactionGameSetup(Focusable):
                 self.game.draw(ctx)
             return
 
-        elif self.gameType == GameType.JOINING:
+        if self.scene is None:
+            # re-recorded only when the lobby changes, not as it breathes
+            self.scene = record(ctx, self.draw_lobby, Param(0))
+        self.scene.play(ctx, (self.breath_offset,))
+
+    def draw_lobby(self, ctx, breath_offset) -> None:
+        if self.gameType == GameType.JOINING:
             base_color = self.color_override
             if not self.room:
                 if not self.color_override:
@@ -221,7 +328,7 @@ class MultiPlayerReactionGameSetup(Focusable):
                 self.drawing.triangle(
                     ctx,
                     0,
-                    112 + self.breath_offset * -0.5,
+                    breath_offset * -0.5 + 112,
                     7,
                     triangle_colour,
                     rotate=math.pi,
@@ -239,9 +346,9 @@ class MultiPlayerReactionGameSetup(Focusable):
 
             ctx.font_size = 22
             ctx.rgb(1, 1, 1).move_to(0, -30).text(f"you have joined")
-            ctx.font_size = 40 * (1 + self.breath_offset / 100)
+            ctx.font_size = breath_offset * 0.4 + 40
             assert self.room is not None
-            ctx.rgb(1, 1, 1).move_to(0, 0 + self.breath_offset).text(self.room.name)
+            ctx.rgb(1, 1, 1).move_to(0, breath_offset).text(self.room.name)
             ctx.font_size = 22
             ctx.rgb(1, 1, 1).move_to(0, 30).text("waiting for host to start")
             return
@@ -258,14 +365,18 @@ class MultiPlayerReactionGameSetup(Focusable):
 
             ctx.font_size = 22
             ctx.rgb(1, 1, 1).move_to(0, -30).text(f"your room name is")
-            ctx.font_size = 40 * (1 + self.breath_offset / 100)
+            ctx.font_size = breath_offset * 0.4 + 40
             assert self.room is not None
-            ctx.rgb(1, 1, 1).move_to(0, 0 + self.breath_offset).text(self.room.name)
+            ctx.rgb(1, 1, 1).move_to(0, breath_offset).text(self.room.name)
             ctx.font_size = 22
             ctx.rgb(1, 1, 1).move_to(0, 30).text(
                 self.subtitle or "players can join now"
             )
             if len(self.room.players) > 0:
+                ctx.font_size = 18
+                ctx.rgb(1, 1, 1).move_to(0, 60).text(
+                    f"up: {self.tournament_format} tournament"
+                )
                 ctx.font_size = 22
                 ctx.rgb(1, 1, 1).move_to(0, 90).text("start")
 
@@ -273,7 +384,7 @@ class MultiPlayerReactionGameSetup(Focusable):
                 self.drawing.triangle(
                     ctx,
                     0,
-                    112 + self.breath_offset * -0.5,
+                    breath_offset * -0.5 + 112,
                     7,
                     triangle_colour,
                     rotate=math.pi,
@@ -290,15 +401,14 @@ class MultiPlayerReactionGameSetup(Focusable):
             if self.total_delta > 3000:
                 self.waiting_message = get_random_waiting_message()
                 self.total_delta = 0
+                self.mark_dirty()
                 """Delta is in milliseconds since last update."""
 
-        # advance our time accumulator in seconds
-        self._time += delta / 1000.0
-
-        # ω = 2π / period
-        omega = 2 * math.pi / self.breath_period
-
-        # sine wave gives ease-in-out; offset swings between –amplitude and +amplitude
-        self.breath_offset = self.breath_amplitude * math.sin(omega * self._time)
+        # the shared animation clock has already advanced by delta
+        self.breath_offset = self.breath.value
+        if self.room:
+            # the room name and the triangle breathe; the search screen is
+            # static. Only the offset changed, so keep the recorded scene.
+            self.dirty = True
 
         return True
@@ -1,21 +1,146 @@
+from ..constants import get_room_id
+
 MACAddress = bytes
 
+MAC_SIZE = 6
+
+
+class Members:
+    """
+    The MACs in one room, in a fixed-capacity bytearray with an open
+    addressing hash index, so membership is O(1) and the memory is set when
+    the room is made however many players come and go.
+
+    Slots are reused: a player who leaves frees theirs for the next to join,
+    and iteration goes in slot order.
+    """
+
+    def __init__(self, capacity: int):
+        if not 0 < capacity < 256:
+            raise ValueError(f"Oops! A room can't hold {capacity} players.")
+        self.capacity = capacity
+        self.macs = bytearray(capacity * MAC_SIZE)
+        self.occupied = bytearray(capacity)
+        size = 8
+        while size < 2 * capacity:
+            size <<= 1
+        self.mask = size - 1
+        self.index = bytearray(size)  # slot + 1, or 0 if empty
+        self.free = list(range(capacity - 1, -1, -1))  # lowest slot last
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __iter__(self):
+        for slot in range(self.capacity):
+            if self.occupied[slot]:
+                yield self.mac(slot)
+
+    def __contains__(self, mac: MACAddress) -> bool:
+        return self.find(mac)[1] >= 0
+
+    def __repr__(self) -> str:
+        return f"Members([{', '.join(mac.hex() for mac in self)}])"
+
+    @property
+    def full(self) -> bool:
+        return not self.free
+
+    def mac(self, slot: int) -> MACAddress:
+        return bytes(self.macs[slot * MAC_SIZE : (slot + 1) * MAC_SIZE])
+
+    def matches(self, slot: int, mac: MACAddress) -> bool:
+        offset = slot * MAC_SIZE
+        macs = self.macs
+        for i in range(MAC_SIZE):
+            if macs[offset + i] != mac[i]:
+                return False
+        return True
+
+    def find(self, mac: MACAddress) -> tuple[int, int]:
+        """Returns (index position, slot) for `mac`; slot is -1 (and the position free) if absent."""
+        i = hash(mac) & self.mask
+        while self.index[i]:
+            slot = self.index[i] - 1
+            if self.matches(slot, mac):
+                return i, slot
+            i = (i + 1) & self.mask
+        return i, -1
+
+    def add(self, mac: MACAddress) -> bool:
+        """Returns False if `mac` is already in; raises ValueError if the room is full."""
+        i, slot = self.find(mac)
+        if slot >= 0:
+            return False
+        if not self.free:
+            raise ValueError(f"Oops! The room is full at {self.capacity} players.")
+        slot = self.free.pop()
+        self.macs[slot * MAC_SIZE : (slot + 1) * MAC_SIZE] = mac
+        self.occupied[slot] = 1
+        self.index[i] = slot + 1
+        self.count += 1
+        return True
+
+    def remove(self, mac: MACAddress) -> bool:
+        """Returns False if `mac` wasn't in."""
+        i, slot = self.find(mac)
+        if slot < 0:
+            return False
+        self.occupied[slot] = 0
+        self.free.append(slot)
+        self.count -= 1
+        # backward shift deletion: pull later entries of the probe run into
+        # the gap so lookups never stop short at it
+        index = self.index
+        j = i
+        while True:
+            index[i] = 0
+            while True:
+                j = (j + 1) & self.mask
+                if not index[j]:
+                    return True
+                home = hash(self.mac(index[j] - 1)) & self.mask
+                # leave it if its home lies cyclically in (i, j]
+                if i <= j:
+                    if i < home <= j:
+                        continue
+                elif home > i or home <= j:
+                    continue
+                break
+            index[i] = index[j]
+            i = j
+
 
 class Room:
     name: str
+    room_id: int
     host_mac: MACAddress
-    players: list[MACAddress] = []
+    players: Members
+    max_players: int = 32
 
     def __str__(self) -> str:
         return f"Room(name={self.name}, host_mac={self.host_mac.hex()})"
 
-    def __init__(self, name: str, host_mac: bytes):
+    def __init__(self, name: str, host_mac: bytes, max_players: int | None = None):
         self.name = name
+        self.room_id = get_room_id(name)
         self.host_mac = host_mac
+        self.players = Members(max_players or self.max_players)
 
-    def add_player(self, player_mac: MACAddress) -> None:
-        if player_mac not in self.players:
-            self.players.append(player_mac)
+    def add_player(self, player_mac: MACAddress) -> bool:
+        """Returns True if the player is in the room now, False if it was full."""
+        try:
+            added = self.players.add(player_mac)
+        except ValueError as e:
+            print(f"Can't add {player_mac.hex()} to room {self.name}: {e}")
+            return False
+        if added:
             print(f"Player {player_mac.hex()} added to room {self.name}")
         else:
             print(f"Player {player_mac.hex()} is already in room {self.name}")
+        return True
+
+    def remove_player(self, player_mac: MACAddress) -> None:
+        if self.players.remove(player_mac):
+            print(f"Player {player_mac.hex()} left room {self.name}")
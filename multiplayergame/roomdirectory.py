@@ -0,0 +1,122 @@
+import asyncio
+import utime
+from typing import Callable
+
+from .. import protocol
+from ..constants import ROOM_ID_LIMIT, get_room_name_from_id
+from .room import MACAddress, Room
+
+
+class DirectoryEntry:
+    room: Room
+    last_seen: int  # ticks_ms
+    rssi: int  # smoothed dBm, higher is closer
+
+    def __init__(self, room: Room, rssi: int, now: int):
+        self.room = room
+        self.rssi = rssi
+        self.last_seen = now
+
+
+class RoomDirectory:
+    """
+    Live list of the rooms being advertised nearby, keyed by host MAC.
+
+    Every HOST beacon refreshes its entry's last-seen time and RSSI (from
+    AIOESPNow's `peers_table`); entries not heard from for `ttl_ms` are
+    evicted. `view` is kept sorted strongest signal first and is updated in
+    place, one entry at a time, so a beacon costs a dict lookup and a small
+    insertion however many hosts are in range.
+    """
+
+    ttl_ms: int = 10000
+    rssi_smoothing: float = 0.25  # weight of the newest RSSI reading
+
+    def __init__(self, on_change: Callable[[], None] | None = None):
+        self.entries: dict[MACAddress, DirectoryEntry] = {}
+        self.view: list[DirectoryEntry] = []
+        self.on_change = on_change
+        self.last_sweep = utime.ticks_ms()
+
+    def __len__(self) -> int:
+        return len(self.view)
+
+    def position(self, host_mac: MACAddress) -> int:
+        for i, entry in enumerate(self.view):
+            if entry.room.host_mac == host_mac:
+                return i
+        return -1
+
+    def place(self, entry: DirectoryEntry) -> None:
+        """Insert `entry` into `view`, keeping it sorted by RSSI."""
+        lo, hi = 0, len(self.view)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.view[mid].rssi >= entry.rssi:
+                lo = mid + 1
+            else:
+                hi = mid
+        self.view.insert(lo, entry)
+
+    def update(self, host_mac: MACAddress, room_id: int, rssi: int | None) -> None:
+        if not 0 <= room_id < ROOM_ID_LIMIT:
+            # a stray or corrupt beacon: no room has that id
+            print(f"Ignoring beacon for unknown room id {room_id} from {host_mac.hex()}")
+            return
+        now = utime.ticks_ms()
+        entry = self.entries.get(host_mac)
+        if entry is None:
+            room = Room(name=get_room_name_from_id(room_id), host_mac=host_mac)
+            entry = DirectoryEntry(room, -100 if rssi is None else rssi, now)
+            self.entries[host_mac] = entry
+            self.place(entry)
+            print(f"Found room: {room.name} from {host_mac.hex()}")
+        else:
+            entry.last_seen = now
+            changed = False
+            if entry.room.room_id != room_id:
+                # the host restarted with a new room
+                entry.room = Room(name=get_room_name_from_id(room_id), host_mac=host_mac)
+                changed = True
+            if rssi is not None:
+                smoothed = int(entry.rssi + (rssi - entry.rssi) * self.rssi_smoothing)
+                if smoothed != entry.rssi:
+                    self.view.remove(entry)
+                    entry.rssi = smoothed
+                    self.place(entry)
+                    changed = True
+            if not changed:
+                return
+        if self.on_change:
+            self.on_change()
+
+    def expire(self) -> None:
+        now = utime.ticks_ms()
+        # a sweep walks every entry, so only do it a few times per TTL
+        if utime.ticks_diff(now, self.last_sweep) < self.ttl_ms // 4:
+            return
+        self.last_sweep = now
+        stale = [
+            mac
+            for mac, entry in self.entries.items()
+            if utime.ticks_diff(now, entry.last_seen) > self.ttl_ms
+        ]
+        for mac in stale:
+            entry = self.entries.pop(mac)
+            self.view.remove(entry)
+            print(f"Room {entry.room.name} from {mac.hex()} expired")
+        if stale and self.on_change:
+            self.on_change()
+
+    async def run(self, comms) -> None:
+        """Feed the directory from HOST beacons until cancelled."""
+        beacons = comms.subscribe(protocol.OP_HOST)
+        while True:
+            try:
+                mac, _, room_id, _ = await asyncio.wait_for(
+                    beacons.get(), self.ttl_ms / 2000
+                )
+                self.update(mac, room_id, comms.rssi(mac))
+            except asyncio.TimeoutError:
+                pass
+            self.expire()
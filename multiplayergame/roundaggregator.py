@@ -0,0 +1,153 @@
+import asyncio
+import utime
+from typing import Callable
+
+from .. import protocol
+from .room import MACAddress, Room
+
+
+class RoundAggregator:
+    """
+    Owns the host's collection window for one round.
+
+    TIME reports are recorded straight from the `Comms` dispatcher as they
+    arrive and every update is streamed to `on_update`. The round finalises
+    when every player in the room (plus the host) has reported, or at the
+    deadline, whichever comes first: missing players are marked DNF and the
+    final board is sent exactly once.
+
+    Each client times its reaction from when its own stimulus reached the
+    screen, which is fair as long as that was at the go-time. TIME also
+    carries the client's timestamps and its clock estimate for us, so
+    `correct` can place its stimulus on our clock: one shown later than the
+    network and a frame or two explain can't be told apart from a wrong
+    timestamp, so the excess counts against the player, give or take the
+    clock's uncertainty. Every result is kept both as measured and as
+    (corrected ms, ± ms) in `scores`, which is what the standings rank by.
+    """
+
+    reaction_window_ms: int = 3000  # how long after go-time players may react
+    presentation_allowance_ms: int = 50  # stimulus lateness put down to drawing it
+    # TIME's ms is from ticks_us; its timestamps are ticks_ms, each rounded down
+    rounding_slack_ms: int = 2
+    finalised: bool = False
+    target: int | None = None  # go-time, our ticks_ms
+    delay_ms: int = 0  # ...as announced in START, relative to sending it
+
+    def __init__(
+        self,
+        comms,
+        room: Room,
+        on_update: Callable[[dict[MACAddress, int]], None] | None = None,
+        round_no: int = protocol.STANDALONE_ROUND,
+    ):
+        self.comms = comms
+        self.room = room
+        self.on_update = on_update
+        self.round_no = round_no
+        self.results: dict[MACAddress, int] = {}
+        self.scores: dict[MACAddress, tuple[int, int]] = {}
+        self.complete = asyncio.Event()
+        comms.on(protocol.OP_TIME, self.on_time, room.room_id)
+
+    @property
+    def expected(self) -> list[MACAddress]:
+        return [self.comms.mac] + list(self.room.players)
+
+    def expect(self, target: int, delay_ms: int) -> None:
+        """The go-time (our ticks_ms) and delay just sent in START."""
+        self.target = target
+        self.delay_ms = delay_ms
+
+    def standings(self) -> list[tuple[MACAddress, int]]:
+        """Corrected results so far, fastest first (DNF sorts last)."""
+        return sorted(
+            self.results.items(),
+            key=lambda result: self.scores.get(result[0], (result[1], 0))[0],
+        )
+
+    def on_time(self, mac: MACAddress, opcode: int, room_id: int, frame: bytes) -> None:
+        timing = protocol.decode_timing(frame)
+        if timing[7] != self.round_no:
+            # a retransmission from an earlier round
+            print(f"Ignoring TIME from {mac.hex()} for round {timing[7]}")
+            return
+        self.record(mac, timing[0], self.correct(mac, timing))
+
+    def correct(
+        self, mac: MACAddress, timing: tuple[int, int, int, int, int, int, int, int]
+    ) -> tuple[int, int]:
+        """Returns (corrected ms, ± ms) for a client's TIME; see the class docs."""
+        time_ms, start_received, onset, pressed, offset_ms, one_way_ms, jitter_ms, _ = (
+            timing
+        )
+        # its own timestamps beat its arithmetic, unless they only differ by
+        # rounding, when the µs-based ms is the better of the two
+        measured = utime.ticks_diff(pressed, onset)
+        if abs(measured - time_ms) > self.rounding_slack_ms:
+            print(f"TIME from {mac.hex()} says {time_ms}ms, timestamps say {measured}ms")
+            time_ms = protocol.clamp_ms(measured)
+        if self.target is None:
+            return time_ms, 0
+        if one_way_ms == protocol.UNKNOWN_MS:
+            # never synced: it went `delay_ms` after START arrived, so only the
+            # part of the lateness after that is visible, to within a frame
+            lateness = utime.ticks_diff(onset, start_received) - self.delay_ms
+            bound = 0
+        else:
+            # the offset is good to about half the round trip
+            lateness = utime.ticks_diff(utime.ticks_add(onset, offset_ms), self.target)
+            bound = one_way_ms + jitter_ms
+        excess = lateness - self.presentation_allowance_ms - bound
+        if excess <= 0:
+            return time_ms, 0
+        print(f"Stimulus for {mac.hex()} was {lateness}ms late, adding {excess}±{bound}ms")
+        return protocol.clamp_ms(time_ms + excess), bound
+
+    def record(
+        self, mac: MACAddress, time_ms: int, score: tuple[int, int] | None = None
+    ) -> None:
+        if self.finalised or mac in self.results:
+            return
+        if mac != self.comms.mac and mac not in self.room.players:
+            print(f"Ignoring TIME from {mac.hex()}, not in room {self.room.name}")
+            return
+        print(f"Received TIME from {mac.hex()}: {time_ms}")
+        self.results[mac] = time_ms
+        self.scores[mac] = score or (time_ms, 0)
+        if self.on_update:
+            self.on_update(self.results)
+        if len(self.results) >= len(self.room.players) + 1:
+            self.complete.set()
+
+    async def collect(self, deadline: int) -> dict[MACAddress, int]:
+        """Wait until everyone reported or `deadline` (ticks_ms), then finalise."""
+        remaining = utime.ticks_diff(deadline, utime.ticks_ms())
+        if remaining > 0:
+            try:
+                await asyncio.wait_for(self.complete.wait(), remaining / 1000)
+            except asyncio.TimeoutError:
+                print(f"Round deadline reached with {len(self.results)} results")
+        return self.finalise()
+
+    def finalise(self) -> dict[MACAddress, int]:
+        if self.finalised:
+            return self.results
+        self.finalised = True
+        self.complete.set()  # finalised early: let `collect` return
+        self.comms.unsubscribe(protocol.OP_TIME, self.room.room_id)
+        for mac in self.expected:
+            if mac not in self.results:
+                self.results[mac] = protocol.DNF_MS
+                self.scores[mac] = (protocol.DNF_MS, 0)
+        if self.on_update:
+            self.on_update(self.results)
+        # broadcast final scoreboard
+        self.comms.send_results(self.room, self.results, self.scores, self.round_no)
+        return self.results
+
+    def cancel(self) -> None:
+        """Abandon the round without sending a board."""
+        if not self.finalised:
+            self.finalised = True
+            self.comms.unsubscribe(protocol.OP_TIME, self.room.room_id)
@@ -0,0 +1,95 @@
+from .. import protocol
+from .room import MACAddress
+
+
+class TournamentFormat:
+    ROUNDS = "rounds"  # play every round, most points wins
+    KNOCKOUT = "knockout"  # slowest contender is out each round
+    BEST_OF = "best of"  # first to win most of the rounds
+
+    ALL = [ROUNDS, KNOCKOUT, BEST_OF]
+
+
+class Tournament:
+    """
+    The host's running score across the rounds of one tournament.
+
+    Each round's corrected board is fed to `record`, fastest first. A
+    contender scores a point for every other contender they beat that round
+    and their time is added to a running total, which breaks ties in points.
+    `KNOCKOUT` then drops the slowest contender (DNF counts as slowest) until
+    one is left; `BEST_OF` counts round wins and stops once someone has won
+    more than half of `rounds`. Knocked out players keep playing (the room
+    doesn't change) but no longer score.
+    """
+
+    def __init__(
+        self,
+        players: list[MACAddress],
+        format: str = TournamentFormat.ROUNDS,
+        rounds: int = 5,
+    ):
+        if format not in TournamentFormat.ALL:
+            raise ValueError(f"Oops! Unknown tournament format {format}.")
+        if not 0 < rounds < 256:
+            raise ValueError(f"Oops! {rounds} rounds won't fit in a round number.")
+        self.format = format
+        self.rounds = rounds
+        self.round = 0  # the latest round started
+        self.played = 0  # ...and recorded
+        self.points: dict[MACAddress, int] = {mac: 0 for mac in players}
+        self.total_ms: dict[MACAddress, int] = {mac: 0 for mac in players}
+        self.wins: dict[MACAddress, int] = {mac: 0 for mac in players}
+        self.knocked_out: list[MACAddress] = []
+
+    @property
+    def contenders(self) -> list[MACAddress]:
+        return [mac for mac in self.points if mac not in self.knocked_out]
+
+    @property
+    def finished(self) -> bool:
+        if self.format == TournamentFormat.KNOCKOUT:
+            return len(self.contenders) <= 1
+        if self.format == TournamentFormat.BEST_OF:
+            if max(self.wins.values(), default=0) > self.rounds // 2:
+                return True
+        return self.played >= self.rounds
+
+    def next_round(self) -> int:
+        """Start the next round; returns its number for START."""
+        self.round += 1
+        return self.round
+
+    def record(self, ranked: list[tuple[MACAddress, int]]) -> None:
+        """Score a round from its (mac, corrected ms) board, fastest first."""
+        self.played += 1
+        contenders = [
+            (mac, t) for mac, t in ranked if mac in self.points and mac not in self.knocked_out
+        ]
+        for place, (mac, t) in enumerate(contenders):
+            if t == protocol.DNF_MS:
+                # no points, and the slowest possible time
+                t = protocol.MAX_MS
+            else:
+                self.points[mac] += len(contenders) - 1 - place
+            self.total_ms[mac] += t
+        if contenders and contenders[0][1] != protocol.DNF_MS:
+            self.wins[contenders[0][0]] += 1
+        if self.format == TournamentFormat.KNOCKOUT and len(contenders) > 1:
+            mac = contenders[-1][0]
+            self.knocked_out.append(mac)
+            print(f"Round {self.round}: {mac.hex()} is knocked out")
+
+    def standings(self) -> list[MACAddress]:
+        """Everyone, best first."""
+        if self.format == TournamentFormat.KNOCKOUT:
+            # still in, then knocked out last-out first
+            return self.contenders + self.knocked_out[::-1]
+        primary = self.wins if self.format == TournamentFormat.BEST_OF else self.points
+        return sorted(
+            self.points, key=lambda mac: (-primary[mac], -self.points[mac], self.total_ms[mac])
+        )
+
+    @property
+    def champion(self) -> MACAddress | None:
+        return self.standings()[0] if self.finished and self.points else None
@@ -0,0 +1,77 @@
+from .multiplayergame.room import MACAddress
+
+ESP_ERR_ESPNOW_FULL = -12392
+ESP_ERR_ESPNOW_NOT_FOUND = -12393
+ESP_ERR_ESPNOW_EXIST = -12395
+
+MAX_PEERS = 20  # ESP-NOW's limit on registered (unencrypted) peers
+
+BROADCAST_MAC = b"\xff\xff\xff\xff\xff\xff"
+
+
+class PeerTable:
+    """
+    Keeps ESP-NOW's peer registrations within `limit`.
+
+    ESP-NOW only unicasts to registered peers and only registers a handful,
+    so every send goes through `ensure`: a peer already registered is just
+    marked as used, otherwise the least recently used one is deleted to make
+    room (never the broadcast address). A host with more players than the
+    hardware allows re-registers them as it talks to them in turn.
+
+    The registrations outlive a `Comms` (the ESP-NOW interface is a
+    singleton), so the table starts from whatever is already registered.
+    """
+
+    def __init__(self, e, limit: int = MAX_PEERS):
+        self.e = e
+        self.limit = limit
+        self.clock = 0
+        self.evictions = 0
+        self.used: dict[MACAddress, int] = {}  # mac -> last used
+        for peer in e.get_peers():
+            self.used[bytes(peer[0])] = 0
+
+    def __len__(self) -> int:
+        return len(self.used)
+
+    def __contains__(self, mac: MACAddress) -> bool:
+        return mac in self.used
+
+    def ensure(self, mac: MACAddress) -> None:
+        """Make sure `mac` is registered, evicting the least recently used peer if full."""
+        self.clock += 1
+        if mac in self.used:
+            self.used[mac] = self.clock
+            return
+        if len(self.used) >= self.limit:
+            self.evict()
+        try:
+            self.e.add_peer(mac)
+        except OSError as e:
+            if e.args[0] == ESP_ERR_ESPNOW_FULL and self.used:
+                # registered behind our back; make room and try once more
+                self.evict()
+                self.e.add_peer(mac)
+            elif e.args[0] != ESP_ERR_ESPNOW_EXIST:
+                raise
+        self.used[mac] = self.clock
+
+    def evict(self) -> None:
+        candidates = [mac for mac in self.used if mac != BROADCAST_MAC]
+        if not candidates:
+            return
+        oldest = min(candidates, key=lambda mac: self.used[mac])
+        print(f"Peer table full, unregistering {oldest.hex()}")
+        self.forget(oldest)
+        self.evictions += 1
+
+    def forget(self, mac: MACAddress) -> None:
+        """Unregister `mac`, if it is registered."""
+        if self.used.pop(mac, None) is None:
+            return
+        try:
+            self.e.del_peer(mac)
+        except OSError as e:
+            if e.args[0] != ESP_ERR_ESPNOW_NOT_FOUND:
+                raise
@@ -0,0 +1,347 @@
+"""
+Binary wire format for Reactz ESP-NOW frames.
+
+Every frame starts with a 5 byte header, followed by struct-packed fields
+that depend on the opcode:
+
+    magic (1) | version (1) | opcode (1) | room id (2, little endian)
+
+Decoding only ever indexes into the received bytes, so the receive path
+can classify a frame without allocating strings.
+"""
+
+import struct
+
+from .multiplayergame.room import MACAddress
+
+MAGIC = 0xB7
+VERSION = 4
+
+HEADER_FORMAT = "<BBBH"
+HEADER_SIZE = 5
+MAX_FRAME_SIZE = 250  # ESP-NOW payload limit
+
+# room id used by `Comms.subscribe` to match frames for any room
+ANY_ROOM = 0xFFFF
+
+# opcodes
+OP_HOST = 1  # host → broadcast: room is open
+OP_JOIN = 2  # client → host: let me in
+OP_JOINED = 3  # host → clients: count (u8) + count * mac, all of them are in
+OP_START = 4  # host → broadcast: target host ticks_ms (u32) + delay_ms (u16) + round (u8)
+OP_TIME = 5  # client → host: reaction ms (u16) + timestamps + round (see `encode_time`)
+OP_RESULT = 6  # host → broadcast: round (u8) + count (u8) + count * (mac, ms, corrected ms, ± ms)
+OP_PING = 7  # any → peer: seq (u8) + t0 (u32)
+OP_PONG = 8  # peer → pinger: seq (u8) + t0, t1, t2 (u32)
+OP_RELIABLE = 9  # any → peer: seq (u16) + a complete inner frame
+OP_ACK = 10  # peer → sender: seq (u16) of a RELIABLE frame
+OP_BATCH = 11  # any → peer: several frames, each prefixed with its length (u8)
+OP_FRAGMENT = 12  # any → peer: message id, index, count (u8) + a slice of a frame
+
+# reaction times are sent as u16; this value means "did not finish"
+DNF_MS = 0xFFFF
+MAX_MS = DNF_MS - 1
+# ...and for a delay or bound, "not known"
+UNKNOWN_MS = DNF_MS
+# round number of a one-off round; tournament rounds count from 1
+STANDALONE_ROUND = 0
+
+_START_FORMAT = "<BBBHIHB"
+_PING_FORMAT = "<BBBHBI"
+_PONG_FORMAT = "<BBBHBIII"
+_TIME_FORMAT = "<BBBHHIIIiHHB"
+_SEQ_FORMAT = "<BBBHH"
+_RESULT_ENTRY_FORMAT = "<6sHHH"
+RESULT_ENTRY_SIZE = 12
+RELIABLE_OVERHEAD = HEADER_SIZE + 2
+FRAGMENT_OVERHEAD = HEADER_SIZE + 3
+MAX_FRAGMENTS = 8
+# bytes of the original frame per fragment, when sent reliably
+MAX_FRAGMENT_CHUNK = MAX_FRAME_SIZE - RELIABLE_OVERHEAD - FRAGMENT_OVERHEAD
+# RESULT frames larger than one ESP-NOW frame are sent as fragments, so a
+# board is limited by how many entries MAX_FRAGMENTS of them carry (156)
+MAX_RESULT_ENTRIES = min(
+    (MAX_FRAGMENTS * MAX_FRAGMENT_CHUNK - HEADER_SIZE - 2) // RESULT_ENTRY_SIZE, 0xFF
+)
+
+
+def clamp_ms(ms: int) -> int:
+    """Clamp a millisecond value so it fits in a u16 field."""
+    if ms < 0:
+        return 0
+    if ms > MAX_MS:
+        return MAX_MS
+    return ms
+
+
+def encode_header(opcode: int, room_id: int) -> bytes:
+    return struct.pack(HEADER_FORMAT, MAGIC, VERSION, opcode, room_id)
+
+
+def decode_header(frame: bytes) -> tuple[int, int] | None:
+    """
+    Classify a frame.
+    Returns:
+        tuple[int, int] | None: (opcode, room id), or None if the frame is
+        not a Reactz frame of a version we understand.
+    """
+    if len(frame) < HEADER_SIZE or frame[0] != MAGIC or frame[1] != VERSION:
+        return None
+    return frame[2], frame[3] | (frame[4] << 8)
+
+
+def encode_host(room_id: int) -> bytes:
+    return encode_header(OP_HOST, room_id)
+
+
+def encode_join(room_id: int) -> bytes:
+    return encode_header(OP_JOIN, room_id)
+
+
+MAX_JOINED_MACS = (MAX_FRAME_SIZE - HEADER_SIZE - 1) // 6
+
+
+def encode_joined(room_id: int, macs: list[MACAddress]) -> bytes:
+    """Acknowledge a batch of JOINs in one frame."""
+    if len(macs) > MAX_JOINED_MACS:
+        raise ValueError(
+            f"Oops! {len(macs)} MACs exceed the {MAX_JOINED_MACS} that fit in one frame."
+        )
+    return encode_header(OP_JOINED, room_id) + bytes([len(macs)]) + b"".join(macs)
+
+
+def joined_includes(frame: bytes, mac: MACAddress) -> bool:
+    """True if a JOINED frame acknowledges `mac`."""
+    offset = HEADER_SIZE + 1
+    for _ in range(frame[HEADER_SIZE]):
+        if frame[offset : offset + 6] == mac:
+            return True
+        offset += 6
+    return False
+
+
+def encode_start(
+    room_id: int, target_ticks: int, delay_ms: int, round_no: int = STANDALONE_ROUND
+) -> bytes:
+    """
+    `target_ticks` is the host's `ticks_ms` at which everyone reacts; `delay_ms`
+    is the same moment relative to sending, for clients without a clock offset.
+    `round_no` is echoed in the TIMEs and RESULT for this round.
+    """
+    return struct.pack(
+        _START_FORMAT,
+        MAGIC,
+        VERSION,
+        OP_START,
+        room_id,
+        target_ticks,
+        clamp_ms(delay_ms),
+        round_no,
+    )
+
+
+def decode_start(frame: bytes) -> tuple[int, int, int]:
+    """Returns (target host ticks_ms, delay ms, round) carried by a START frame."""
+    return struct.unpack_from("<IHB", frame, HEADER_SIZE)
+
+
+def encode_ping(seq: int, t0: int) -> bytes:
+    return struct.pack(_PING_FORMAT, MAGIC, VERSION, OP_PING, ANY_ROOM, seq, t0)
+
+
+def decode_ping(frame: bytes) -> tuple[int, int]:
+    """Returns (seq, t0) carried by a PING frame."""
+    return struct.unpack_from("<BI", frame, HEADER_SIZE)
+
+
+def encode_pong(seq: int, t0: int, t1: int, t2: int) -> bytes:
+    return struct.pack(
+        _PONG_FORMAT, MAGIC, VERSION, OP_PONG, ANY_ROOM, seq, t0, t1, t2
+    )
+
+
+def decode_pong(frame: bytes) -> tuple[int, int, int, int]:
+    """Returns (seq, t0, t1, t2) carried by a PONG frame."""
+    return struct.unpack_from("<BIII", frame, HEADER_SIZE)
+
+
+def encode_time(
+    room_id: int,
+    time_ms: int,
+    start_received: int = 0,
+    onset: int = 0,
+    pressed: int = 0,
+    offset_ms: int = 0,
+    one_way_ms: int = UNKNOWN_MS,
+    jitter_ms: int = 0,
+    round_no: int = STANDALONE_ROUND,
+) -> bytes:
+    """
+    `start_received`, `onset` and `pressed` are the client's ticks_ms when
+    START arrived, the stimulus reached the screen and the button went down.
+    `offset_ms` (host - client), `one_way_ms` and `jitter_ms` are its clock
+    estimate for the host; `one_way_ms` is UNKNOWN_MS if it never synced.
+    `round_no` is the round from the START.
+    """
+    return struct.pack(
+        _TIME_FORMAT,
+        MAGIC,
+        VERSION,
+        OP_TIME,
+        room_id,
+        clamp_ms(time_ms),
+        start_received,
+        onset,
+        pressed,
+        offset_ms,
+        clamp_ms(one_way_ms) if one_way_ms != UNKNOWN_MS else UNKNOWN_MS,
+        clamp_ms(jitter_ms),
+        round_no,
+    )
+
+
+def decode_time(frame: bytes) -> int:
+    """Returns the reaction time in ms carried by a TIME frame."""
+    return struct.unpack_from("<H", frame, HEADER_SIZE)[0]
+
+
+def decode_timing(frame: bytes) -> tuple[int, int, int, int, int, int, int, int]:
+    """
+    Returns (ms, start received, onset, pressed, offset ms, one-way ms,
+    jitter ms, round) carried by a TIME frame; see `encode_time`.
+    """
+    return struct.unpack_from("<HIIIiHHB", frame, HEADER_SIZE)
+
+
+def encode_result(
+    room_id: int,
+    results: dict[MACAddress, int],
+    scores: dict[MACAddress, tuple[int, int]] | None = None,
+    round_no: int = STANDALONE_ROUND,
+) -> bytes:
+    """
+    `results` are the reaction times as measured; `scores` the host's
+    (corrected ms, ± ms) for each, where it has one.
+    """
+    count = len(results)
+    if count > MAX_RESULT_ENTRIES:
+        raise ValueError(
+            f"Oops! {count} results exceed the {MAX_RESULT_ENTRIES} a RESULT can carry."
+        )
+    frame = bytearray(HEADER_SIZE + 2 + count * RESULT_ENTRY_SIZE)
+    struct.pack_into(HEADER_FORMAT, frame, 0, MAGIC, VERSION, OP_RESULT, room_id)
+    frame[HEADER_SIZE] = round_no
+    frame[HEADER_SIZE + 1] = count
+    offset = HEADER_SIZE + 2
+    for mac, t in results.items():
+        corrected, bound = scores.get(mac, (t, 0)) if scores else (t, 0)
+        struct.pack_into(
+            _RESULT_ENTRY_FORMAT,
+            frame,
+            offset,
+            mac,
+            clamp_ms(t) if t != DNF_MS else DNF_MS,
+            clamp_ms(corrected) if corrected != DNF_MS else DNF_MS,
+            clamp_ms(bound),
+        )
+        offset += RESULT_ENTRY_SIZE
+    return bytes(frame)
+
+
+def decode_result(frame: bytes) -> dict[MACAddress, int]:
+    """Returns the scoreboard carried by a RESULT frame, keyed by raw MAC."""
+    results: dict[MACAddress, int] = {}
+    count = frame[HEADER_SIZE + 1]
+    offset = HEADER_SIZE + 2
+    for _ in range(count):
+        mac, t = struct.unpack_from("<6sH", frame, offset)
+        results[mac] = t
+        offset += RESULT_ENTRY_SIZE
+    return results
+
+
+def decode_result_round(frame: bytes) -> int:
+    """Returns the round a RESULT frame is the board for."""
+    return frame[HEADER_SIZE]
+
+
+def decode_scores(frame: bytes) -> dict[MACAddress, tuple[int, int]]:
+    """Returns the host's (corrected ms, ± ms) per raw MAC from a RESULT frame."""
+    scores: dict[MACAddress, tuple[int, int]] = {}
+    count = frame[HEADER_SIZE + 1]
+    offset = HEADER_SIZE + 2
+    for _ in range(count):
+        mac, _, corrected, bound = struct.unpack_from(
+            _RESULT_ENTRY_FORMAT, frame, offset
+        )
+        scores[mac] = (corrected, bound)
+        offset += RESULT_ENTRY_SIZE
+    return scores
+
+
+def encode_reliable(seq: int, inner: bytes) -> bytes:
+    """Wrap an already encoded frame so the receiver ACKs it."""
+    room_id = inner[3] | (inner[4] << 8)
+    return struct.pack(_SEQ_FORMAT, MAGIC, VERSION, OP_RELIABLE, room_id, seq) + inner
+
+
+def decode_reliable(frame: bytes) -> tuple[int, bytes]:
+    """Returns (seq, inner frame) carried by a RELIABLE frame."""
+    return struct.unpack_from("<H", frame, HEADER_SIZE)[0], frame[RELIABLE_OVERHEAD:]
+
+
+def encode_ack(room_id: int, seq: int) -> bytes:
+    return struct.pack(_SEQ_FORMAT, MAGIC, VERSION, OP_ACK, room_id, seq)
+
+
+def decode_ack(frame: bytes) -> int:
+    """Returns the seq acknowledged by an ACK frame."""
+    return struct.unpack_from("<H", frame, HEADER_SIZE)[0]
+
+
+def encode_batch(frames: list[bytes]) -> bytes:
+    """Coalesce frames for the same peer into one; see `batch_size`."""
+    batch = bytearray(encode_header(OP_BATCH, ANY_ROOM))
+    for frame in frames:
+        batch.append(len(frame))
+        batch.extend(frame)
+    return bytes(batch)
+
+
+def batch_size(frames_size: int, count: int) -> int:
+    """Size of a BATCH frame holding `count` frames of `frames_size` bytes in total."""
+    return HEADER_SIZE + count + frames_size
+
+
+def decode_batch(frame: bytes) -> list[bytes]:
+    """Returns the frames carried by a BATCH frame."""
+    frames = []
+    offset = HEADER_SIZE
+    while offset < len(frame):
+        length = frame[offset]
+        frames.append(frame[offset + 1 : offset + 1 + length])
+        offset += 1 + length
+    return frames
+
+
+def encode_fragments(msg_id: int, frame: bytes, chunk_size: int) -> list[bytes]:
+    """Split `frame` into FRAGMENT frames carrying at most `chunk_size` bytes each."""
+    count = (len(frame) + chunk_size - 1) // chunk_size
+    if count > MAX_FRAGMENTS:
+        raise ValueError(
+            f"Oops! Message size {len(frame)} needs {count} fragments, more than {MAX_FRAGMENTS}."
+        )
+    room_id = frame[3] | (frame[4] << 8)
+    return [
+        struct.pack(
+            "<BBBHBBB", MAGIC, VERSION, OP_FRAGMENT, room_id, msg_id, index, count
+        )
+        + frame[index * chunk_size : (index + 1) * chunk_size]
+        for index in range(count)
+    ]
+
+
+def decode_fragment(frame: bytes) -> tuple[int, int, int, bytes]:
+    """Returns (message id, index, count, chunk) carried by a FRAGMENT frame."""
+    msg_id, index, count = struct.unpack_from("<BBB", frame, HEADER_SIZE)
+    return msg_id, index, count, frame[FRAGMENT_OVERHEAD:]
@@ -0,0 +1,122 @@
+import math
+
+
+class P2Quantile:
+    """
+    Running estimate of one quantile (Jain & Chlamtac's P² algorithm).
+
+    Five markers track the minimum, the quantile, the maximum and two points
+    in between; each sample nudges their heights with a parabolic fit, so the
+    estimate costs five numbers however many samples it has seen. Until there
+    are five samples it is exact.
+    """
+
+    def __init__(self, p: float):
+        self.p = p
+        self.heights: list[float] = []
+        self.positions = [0, 1, 2, 3, 4]
+        self.desired = [0, 2 * p, 4 * p, 2 + 2 * p, 4]
+        self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def add(self, x: float) -> None:
+        q = self.heights
+        if len(q) < 5:
+            q.append(x)
+            q.sort()
+            return
+        n = self.positions
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+        for i in (1, 2, 3):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                height = self.parabolic(i, d)
+                if not q[i - 1] < height < q[i + 1]:
+                    # the fit overshot a neighbour: move linearly instead
+                    height = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = height
+                n[i] += d
+
+    def parabolic(self, i: int, d: int) -> float:
+        q = self.heights
+        n = self.positions
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    @property
+    def value(self) -> float | None:
+        q = self.heights
+        if not q:
+            return None
+        if len(q) < 5:
+            return q[int(self.p * (len(q) - 1) + 0.5)]
+        return q[2]
+
+
+class ReactionStats:
+    """
+    Streaming statistics for one player's reaction times: count, mean and
+    variance (Welford), min/max, an exponentially weighted moving average and
+    P² estimates of the median and 90th percentile. Memory stays the same
+    however many rounds are played, and `add` is a handful of float ops.
+    """
+
+    ewma_alpha: float = 0.25  # weight of the newest reaction
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0  # sum of squared deviations from the mean
+        self.min: int | None = None
+        self.max: int | None = None
+        self.ewma: float | None = None
+        self.p50 = P2Quantile(0.5)
+        self.p90 = P2Quantile(0.9)
+
+    def add(self, ms: int) -> None:
+        self.count += 1
+        delta = ms - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (ms - self.mean)
+        if self.min is None or ms < self.min:
+            self.min = ms
+        if self.max is None or ms > self.max:
+            self.max = ms
+        if self.ewma is None:
+            self.ewma = float(ms)
+        else:
+            self.ewma += self.ewma_alpha * (ms - self.ewma)
+        self.p50.add(ms)
+        self.p90.add(ms)
+
+    @property
+    def variance(self) -> float:
+        """Sample variance, 0 until there are two reactions."""
+        if self.count < 2:
+            return 0.0
+        return self.m2 / (self.count - 1)
+
+    @property
+    def stddev(self) -> float:
+        return math.sqrt(self.variance)
+
+    def trend(self, ms: int) -> int:
+        """-1 if `ms` beats the moving average, 1 if it's slower, 0 if level (or no average yet)."""
+        if self.ewma is None or abs(ms - self.ewma) < 1:
+            return 0
+        return -1 if ms < self.ewma else 1
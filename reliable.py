@@ -0,0 +1,186 @@
+import asyncio
+import random
+import utime
+
+from . import protocol
+from .multiplayergame.room import MACAddress
+from .peertable import BROADCAST_MAC
+from .sendqueue import PRIORITY_NORMAL, PRIORITY_URGENT
+
+# how many recent sequence numbers per peer are remembered for duplicates
+SEEN_WINDOW = 32
+
+
+class Delivery:
+    """Completion handle for one reliable send."""
+
+    delivered: bool = False
+    finished: bool = False
+
+    def __init__(self):
+        self.event = asyncio.Event()
+
+    def finish(self, delivered: bool) -> None:
+        if self.finished:
+            return
+        self.delivered = delivered
+        self.finished = True
+        self.event.set()
+
+    async def wait(self) -> bool:
+        """Returns True once ACKed, False if the deadline passed first."""
+        await self.event.wait()
+        return self.delivered
+
+
+class PendingSend:
+    addr: MACAddress
+    wrapped: bytes
+    priority: int
+    delivery: Delivery
+    started: int  # ticks_ms
+    deadline_ms: int
+    timeout_ms: int
+    due: int  # ticks_ms of the next retransmit
+
+    def __init__(self, addr, wrapped, priority, delivery, started, deadline_ms, timeout_ms):
+        self.addr = addr
+        self.wrapped = wrapped
+        self.priority = priority
+        self.delivery = delivery
+        self.started = started
+        self.deadline_ms = deadline_ms
+        self.timeout_ms = timeout_ms
+        self.due = utime.ticks_add(started, timeout_ms)
+
+
+class ReliableChannel:
+    """
+    Opt-in acknowledged delivery on top of `Comms`.
+
+    `send` wraps a frame in a RELIABLE frame with a sequence number and posts
+    it; a single retransmit task reposts it with exponential backoff until the
+    peer ACKs it or `deadline_ms` passes. Receivers ACK every copy but only
+    deliver the first, so retransmits never show up twice in a `Comms` queue.
+
+    `send_many` broadcasts one copy for a whole group of peers and only
+    retransmits, by unicast, to those that haven't ACKed. That is why the
+    sequence numbers are shared by every peer rather than counted per peer:
+    one number has to be new to all of them.
+    """
+
+    initial_timeout_ms: int = 60
+    max_timeout_ms: int = 800
+    deadline_ms: int = 3000
+
+    def __init__(self, comms):
+        self.comms = comms
+        # random start so a restarted badge is not mistaken for duplicates
+        self.seq = random.randint(0, 0xFFFF)
+        self.pending: dict[tuple[MACAddress, int], PendingSend] = {}
+        self.seen: dict[MACAddress, list[int]] = {}
+        self.wake = asyncio.Event()
+        self.task = asyncio.create_task(self.retransmit())
+        comms.on(protocol.OP_RELIABLE, self.on_reliable)
+        comms.on(protocol.OP_ACK, self.on_ack)
+
+    def close(self) -> None:
+        self.task.cancel()
+
+    def send(
+        self,
+        addr: MACAddress,
+        frame: bytes,
+        deadline_ms: int | None = None,
+        priority: int = PRIORITY_NORMAL,
+    ) -> Delivery:
+        return self.send_many([addr], frame, deadline_ms, priority)[0]
+
+    def send_many(
+        self,
+        addrs: list[MACAddress],
+        frame: bytes,
+        deadline_ms: int | None = None,
+        priority: int = PRIORITY_NORMAL,
+    ) -> list[Delivery]:
+        """
+        Send `frame` to each of `addrs`: once by broadcast if there are
+        several, retransmitted to each peer on its own until it ACKs.
+        Returns one `Delivery` per peer, in the order of `addrs`.
+        """
+        seq = self.seq
+        self.seq = (seq + 1) & 0xFFFF
+        wrapped = protocol.encode_reliable(seq, frame)
+        now = utime.ticks_ms()
+        deliveries = []
+        for addr in addrs:
+            delivery = Delivery()
+            self.pending[(addr, seq)] = PendingSend(
+                addr,
+                wrapped,
+                priority,
+                delivery,
+                now,
+                self.deadline_ms if deadline_ms is None else deadline_ms,
+                self.initial_timeout_ms,
+            )
+            deliveries.append(delivery)
+        if len(addrs) == 1:
+            self.comms.post(addrs[0], wrapped, priority)
+        elif addrs:
+            self.comms.post(BROADCAST_MAC, wrapped, priority)
+        self.wake.set()
+        return deliveries
+
+    async def retransmit(self) -> None:
+        """Repost every unacknowledged frame when its backoff timer is due."""
+        while True:
+            now = utime.ticks_ms()
+            wait_ms = None
+            for key in list(self.pending):
+                pending = self.pending[key]
+                remaining = pending.deadline_ms - utime.ticks_diff(now, pending.started)
+                if remaining <= 0:
+                    print(f"Gave up on reliable send {key[1]} to {pending.addr.hex()}")
+                    del self.pending[key]
+                    pending.delivery.finish(False)
+                    continue
+                if utime.ticks_diff(pending.due, now) <= 0:
+                    self.comms.post(pending.addr, pending.wrapped, pending.priority)
+                    pending.timeout_ms = min(pending.timeout_ms * 2, self.max_timeout_ms)
+                    pending.due = utime.ticks_add(now, pending.timeout_ms)
+                next_ms = min(utime.ticks_diff(pending.due, now), remaining)
+                if wait_ms is None or next_ms < wait_ms:
+                    wait_ms = next_ms
+            self.wake.clear()
+            if wait_ms is None:
+                await self.wake.wait()
+            else:
+                try:
+                    await asyncio.wait_for(self.wake.wait(), max(wait_ms, 1) / 1000)
+                except asyncio.TimeoutError:
+                    pass
+
+    def on_ack(self, mac: MACAddress, opcode: int, room_id: int, frame: bytes) -> None:
+        pending = self.pending.pop((mac, protocol.decode_ack(frame)), None)
+        if pending:
+            pending.delivery.finish(True)
+
+    def on_reliable(
+        self, mac: MACAddress, opcode: int, room_id: int, frame: bytes
+    ) -> None:
+        seq, inner = protocol.decode_reliable(frame)
+        # ACK every copy: the previous ACK may be the frame that got lost
+        self.comms.post(mac, protocol.encode_ack(room_id, seq), PRIORITY_URGENT)
+        seen = self.seen.get(mac)
+        if seen is None:
+            seen = self.seen[mac] = []
+        if seq in seen:
+            return
+        seen.append(seq)
+        if len(seen) > SEEN_WINDOW:
+            seen.pop(0)
+        header = protocol.decode_header(inner)
+        if header is None:
+            return
+        self.comms.deliver((mac, header[0], header[1], inner))
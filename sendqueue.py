@@ -0,0 +1,112 @@
+import asyncio
+
+from . import protocol
+from .multiplayergame.room import MACAddress
+
+# lower numbers are sent first
+PRIORITY_URGENT = 0  # START, TIME, ACK: on the reaction critical path
+PRIORITY_NORMAL = 1  # JOINED, RESULT
+PRIORITY_BACKGROUND = 2  # HOST beacons
+
+# per priority: (max queued frames, drop the newest frame instead of the oldest when full)
+LIMITS = (
+    (16, False),
+    (32, True),
+    (4, False),
+)
+
+
+class SendQueue:
+    """
+    The single outbound path of `Comms`.
+
+    `post` never blocks: it appends to a bounded per-priority queue and wakes
+    one worker task, which sends the most urgent frame first. Frames queued
+    for the same peer are coalesced into one BATCH frame of at most
+    `protocol.MAX_FRAME_SIZE` bytes, and a frame identical to one already
+    queued for the same peer is not queued twice (e.g. repeated beacons).
+    """
+
+    sent: int = 0
+    dropped: int = 0
+    coalesced: int = 0
+    failures: int = 0
+
+    def __init__(self, comms):
+        self.comms = comms
+        self.queues: list[list[tuple[MACAddress, bytes]]] = [[] for _ in LIMITS]
+        self.event = asyncio.Event()
+        self.task = asyncio.create_task(self.run())
+
+    def __len__(self) -> int:
+        return sum(len(queue) for queue in self.queues)
+
+    def close(self) -> None:
+        self.task.cancel()
+
+    def post(
+        self,
+        addr: MACAddress,
+        frame: bytes,
+        priority: int = PRIORITY_NORMAL,
+    ) -> bool:
+        """Queue `frame` for `addr`. Returns False if it was dropped."""
+        self.comms.check_size_of_message(frame)
+        queue = self.queues[priority]
+        item = (addr, frame)
+        if item in queue:
+            return True
+        limit, drop_newest = LIMITS[priority]
+        if len(queue) >= limit:
+            self.dropped += 1
+            if drop_newest:
+                return False
+            queue.pop(0)
+        queue.append(item)
+        self.event.set()
+        return True
+
+    def take(self) -> tuple[MACAddress, bytes] | None:
+        """Pop the most urgent frame and coalesce what else is queued for its peer."""
+        for priority, queue in enumerate(self.queues):
+            if not queue:
+                continue
+            addr, frame = queue.pop(0)
+            frames = [frame]
+            size = len(frame)
+            for other in self.queues[priority:]:
+                i = 0
+                while i < len(other):
+                    other_addr, other_frame = other[i]
+                    if other_addr == addr and (
+                        protocol.batch_size(size + len(other_frame), len(frames) + 1)
+                        <= protocol.MAX_FRAME_SIZE
+                    ):
+                        frames.append(other_frame)
+                        size += len(other_frame)
+                        other.pop(i)
+                    else:
+                        i += 1
+            if len(frames) == 1:
+                return addr, frame
+            self.coalesced += len(frames) - 1
+            return addr, protocol.encode_batch(frames)
+        return None
+
+    async def run(self) -> None:
+        while True:
+            item = self.take()
+            if item is None:
+                self.event.clear()
+                await self.event.wait()
+                continue
+            addr, frame = item
+            try:
+                await self.comms.send_async(addr, frame)
+                self.sent += 1
+            except asyncio.CancelledError:
+                raise
+            except OSError as e:
+                self.failures += 1
+                # if code -12393, it means the peer is not available
+                print(f"Send to {addr.hex()} failed: {e}")
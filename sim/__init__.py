@@ -0,0 +1,24 @@
+"""
+An in-process ESP-NOW simulator for Reactz.
+
+Stand-in `aioespnow`, `network` and `utime` modules route every badge's radio
+through one shared `Medium`, with per-link latency, jitter, loss and
+duplication, so dozens of hosts and clients run the app's real networking
+code in a single CPython process. Time is virtual: `run` only advances the
+clock when every task is waiting, so results are fast and repeatable.
+
+    python -m sim --players 12 --loss 0.05
+"""
+
+import contextlib
+import io
+
+from .badge import Badge, current_badge
+from .fakes import eventbus, install, load_app
+from .loop import VirtualTimeLoop, run
+from .medium import LinkProfile, Medium, MediumStats
+
+
+def quiet():
+    """Swallow the app's chatty `print` logging."""
+    return contextlib.redirect_stdout(io.StringIO())
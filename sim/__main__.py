@@ -0,0 +1,39 @@
+import argparse
+import json
+
+from . import LinkProfile, quiet, run
+from .scenario import RoomFull, play
+
+parser = argparse.ArgumentParser(description="Play one simulated Reactz round")
+parser.add_argument("--players", type=int, default=4, help="badges per room, host included")
+parser.add_argument("--rooms", type=int, default=1)
+parser.add_argument("--latency", type=float, default=2.0, help="ms")
+parser.add_argument("--jitter", type=float, default=1.0, help="ms")
+parser.add_argument("--loss", type=float, default=0.0)
+parser.add_argument("--duplicate", type=float, default=0.0)
+parser.add_argument("--seed", type=int, default=0)
+parser.add_argument(
+    "--tournament", choices=["rounds", "knockout", "best of"], help="play a tournament"
+)
+parser.add_argument("--rounds", type=int, default=5, help="tournament rounds")
+parser.add_argument("--verbose", action="store_true", help="show the app's logging")
+args = parser.parse_args()
+
+profile = LinkProfile(args.latency, args.jitter, args.loss, args.duplicate)
+scenario = play(
+    args.players,
+    args.rooms,
+    profile,
+    args.seed,
+    tournament=args.tournament,
+    rounds=args.rounds,
+)
+try:
+    if args.verbose:
+        report = run(scenario)
+    else:
+        with quiet():
+            report = run(scenario)
+except RoomFull as e:
+    parser.exit(1, f"Room full: {e}\n")
+print(json.dumps(report, indent=2))
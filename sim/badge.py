@@ -0,0 +1,57 @@
+import asyncio
+import contextvars
+
+from .medium import Medium, Radio
+
+# MicroPython on the ESP32 wraps ticks at 2**30
+TICKS_PERIOD = 1 << 30
+TICKS_MAX = TICKS_PERIOD - 1
+TICKS_HALFPERIOD = TICKS_PERIOD // 2
+
+current_badge: contextvars.ContextVar["Badge | None"] = contextvars.ContextVar(
+    "current_badge", default=None
+)
+
+
+class Badge:
+    """
+    One virtual Tildagon: a MAC address, a `Radio` on the shared medium and
+    its own ticks clock (offset by `skew_ms` from the event loop's clock).
+
+    Code runs "on" the badge when it is called through `call` or started with
+    `spawn`; the stand-in `aioespnow`, `network` and `utime` modules use
+    whichever badge is current, and asyncio tasks inherit it.
+    """
+
+    def __init__(self, medium: Medium, mac: bytes, skew_ms: int = 0, domain: int = 0):
+        self.medium = medium
+        self.mac = mac
+        self.skew_ms = skew_ms
+        self.radio: Radio = medium.attach(mac, domain)
+        self.radio.badge = self
+        self.context = contextvars.copy_context()
+        self.context.run(current_badge.set, self)
+        self.tasks: list[asyncio.Task] = []
+
+    def __repr__(self) -> str:
+        return f"Badge({self.mac.hex()})"
+
+    def ticks_us(self) -> int:
+        loop_us = int(asyncio.get_running_loop().time() * 1_000_000)
+        return (loop_us + self.skew_ms * 1000) & TICKS_MAX
+
+    def ticks_ms(self) -> int:
+        loop_ms = int(asyncio.get_running_loop().time() * 1000)
+        return (loop_ms + self.skew_ms) & TICKS_MAX
+
+    def call(self, fn, *args):
+        """Run `fn(*args)` as this badge, e.g. to construct a Focusable."""
+        if current_badge.get() is self:
+            return fn(*args)
+        return self.context.copy().run(fn, *args)
+
+    def spawn(self, coro) -> asyncio.Task:
+        """Start a coroutine as this badge."""
+        task = asyncio.get_running_loop().create_task(coro, context=self.context.copy())
+        self.tasks.append(task)
+        return task
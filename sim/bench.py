@@ -0,0 +1,151 @@
+"""
+Multiplayer scale benchmark: sweeps players per room, loss rate and number of
+competing rooms through the real discover → join → START → TIME → RESULT
+path and writes one JSON object per configuration to `bench_output.txt`.
+
+    python -m sim.bench --players 2 8 16 32 --loss 0 0.05 --rooms 1 3
+
+Every run gets a fresh interpreter so module-level state in the app can't
+leak from one run into the next.
+"""
+
+import argparse
+import concurrent.futures
+import itertools
+import json
+import multiprocessing
+import time
+
+OUTPUT = "bench_output.txt"
+# badges per room, host included; a round needs someone to play against
+PLAYER_COUNTS = (2, 4, 8, 16, 24, 32, 48, 64)
+
+
+def default_players() -> list[int]:
+    """`PLAYER_COUNTS` up to a full room (the host isn't in `Room.players`)."""
+    from .fakes import load_app
+
+    capacity = load_app("multiplayergame.room").Room.max_players + 1
+    return [n for n in PLAYER_COUNTS if n <= capacity]
+
+
+def percentile(values: list[float], p: float) -> float | None:
+    """Nearest-rank percentile, None for no samples."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(p / 100 * len(ordered) + 0.5) - 1))
+    return ordered[rank]
+
+
+def summarise(values: list[float]) -> dict:
+    return {
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": max(values) if values else None,
+    }
+
+
+def run_once(players: int, rooms: int, loss: float, latency_ms: float, seed: int) -> dict:
+    """One simulated round (in a worker process)."""
+    from . import LinkProfile, quiet, run
+    from .scenario import RoomFull, TimedOut, play
+
+    profile = LinkProfile(latency_ms=latency_ms, jitter_ms=latency_ms / 2, loss=loss)
+    with quiet():
+        try:
+            return run(play(players, rooms, profile, seed))
+        except RoomFull as e:
+            return {"error": str(e), "over_capacity": True}
+        except TimedOut as e:
+            return {"error": str(e)}
+
+
+def bench(
+    players: int,
+    rooms: int,
+    loss: float,
+    latency_ms: float,
+    runs: int,
+    pool: concurrent.futures.Executor,
+) -> dict:
+    started = time.perf_counter()
+    reports = list(
+        pool.map(
+            run_once,
+            [players] * runs,
+            [rooms] * runs,
+            [loss] * runs,
+            [latency_ms] * runs,
+            range(runs),
+        )
+    )
+    ok = [r for r in reports if "error" not in r]
+    fills = [ms for r in ok for ms in r["lobby_fill_ms"]]
+    rounds = [ms for r in ok for ms in r["round_ms"]]
+    boards = [ms for r in ok for ms in r["board_ms"] if ms is not None]
+    frames = [r["round_frames"] / rooms for r in ok]
+    delivered = sum(sum(r["boards_delivered"]) for r in ok)
+    return {
+        "players": players,
+        "rooms": rooms,
+        "loss": loss,
+        "latency_ms": latency_ms,
+        "runs": runs,
+        "failed": len(reports) - len(ok),
+        "over_capacity": sum(1 for r in reports if r.get("over_capacity")),
+        "errors": sorted({r["error"] for r in reports if "error" in r}),
+        "lobby_fill_ms": summarise(fills),
+        "round_ms": summarise(rounds),
+        "board_ms": summarise(boards),
+        "frames_per_round": summarise(frames),
+        "lobby_frames": summarise([r["lobby_frames"] for r in ok]),
+        "peak_tasks_host": max((r["peak_tasks"]["host"] for r in ok), default=None),
+        "peak_tasks_client": max((r["peak_tasks"]["client"] for r in ok), default=None),
+        "boards_delivered": delivered / max(1, len(ok) * rooms * (players - 1)),
+        "wall_s": round(time.perf_counter() - started, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Reactz multiplayer scale benchmark")
+    parser.add_argument(
+        "--players", type=int, nargs="+", help="default: 2 up to a full room"
+    )
+    parser.add_argument("--loss", type=float, nargs="+", default=[0.0, 0.05, 0.2])
+    parser.add_argument("--rooms", type=int, nargs="+", default=[1, 3])
+    parser.add_argument("--latency", type=float, default=2.0, help="ms per hop")
+    parser.add_argument("--runs", type=int, default=10, help="seeds per configuration")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes")
+    parser.add_argument("--output", default=OUTPUT)
+    args = parser.parse_args()
+    if args.players is None:
+        args.players = default_players()
+    elif min(args.players) < 2:
+        parser.error("--players: a round needs at least 2 badges")
+
+    context = multiprocessing.get_context("spawn")
+    with concurrent.futures.ProcessPoolExecutor(
+        args.jobs, mp_context=context, max_tasks_per_child=1
+    ) as pool, open(args.output, "w") as output:
+        for rooms, loss, players in itertools.product(
+            args.rooms, args.loss, args.players
+        ):
+            result = bench(players, rooms, loss, args.latency, args.runs, pool)
+            output.write(json.dumps(result) + "\n")
+            output.flush()
+            print(
+                f"players={players:2} rooms={rooms} loss={loss:.2f}  "
+                f"fill p50/p95/p99={result['lobby_fill_ms']['p50']}/"
+                f"{result['lobby_fill_ms']['p95']}/{result['lobby_fill_ms']['p99']}ms  "
+                f"board p95={result['board_ms']['p95']}ms  "
+                f"frames/round p50={result['frames_per_round']['p50']}  "
+                f"tasks host/client={result['peak_tasks_host']}/{result['peak_tasks_client']}  failed={result['failed']}"
+                + ("  (over room capacity)" if result["over_capacity"] else "")
+            )
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Per-frame draw cost of every screen and state, rendered through the real
+`Reactz.draw` into a `RecordingCtx`.
+
+    python -m sim.drawbench --frames 200 --json draw_bench.json
+
+For each state this reports ctx ops, fills, gradients, text draws and path
+points per frame, Python time per frame (update + draw) and the peak bytes
+allocated while drawing a frame, as traced by `tracemalloc`.
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+
+from . import Badge, Medium, quiet, run
+from .fakes import load_app
+from .recordingctx import RecordingCtx
+from .scenario import make_mac
+
+FRAME_MS = 20  # update delta per frame, ~50 fps
+
+
+def screens(badge: Badge) -> list[tuple[str, object]]:
+    """(name, Focusable) for each screen in each state worth measuring."""
+    game_type = load_app("mainmenu").GameType
+    MainMenu = load_app("mainmenu").MainMenu
+    SinglePlayerReactionGame = load_app("singleplayergame").SinglePlayerReactionGame
+    Setup = load_app("multiplayergame.multiplayergamesetup").MultiPlayerReactionGameSetup
+    Game = load_app("multiplayergame.multiplayergamegame").MultiPlayerReactionGameGame
+    Room = load_app("multiplayergame.room").Room
+    Comms = load_app("comms").Comms
+
+    comms = badge.call(Comms)
+    host_mac = make_mac(0)
+    players = [make_mac(i) for i in range(1, 8)]
+
+    def single(react_set: bool, reacted_in: str | None):
+        screen = SinglePlayerReactionGame()
+        screen.react_set = react_set
+        screen.reacted_in = reacted_in
+        return screen
+
+    def lobby(kind: str, room=None, joined: int = 0):
+        screen = badge.call(Setup, kind)
+        if room is not None:
+            screen.room = room
+            screen.waiting_message = room.name
+        for mac in players[:joined]:
+            screen.room.add_player(mac)
+        return screen
+
+    def game(react_set: bool, reacted_in: str | None, results: int = 0):
+        room = Room("cactus kite", host_mac)
+        for mac in players:
+            room.add_player(mac)
+        screen = Game(comms, room, is_host=False)
+        screen.react_set = react_set
+        screen.reacted_in = reacted_in
+        screen.waiting_for_host_to_start = not (react_set or reacted_in)
+        board = [comms.mac] + players[: results - 1] if results else []
+        screen.results = {mac: 200 + 17 * i for i, mac in enumerate(board)}
+        return screen
+
+    def session(rounds: int):
+        screen = game(False, "234", results=8)
+        screen.is_host = True
+        for _ in range(rounds):
+            screen.update_session()
+        screen.showing_session = True
+        return screen
+
+    return [
+        ("menu", MainMenu()),
+        ("single/waiting", single(False, None)),
+        ("single/armed", single(True, None)),
+        ("single/reacted", single(False, "234")),
+        ("lobby/searching", lobby(game_type.JOINING)),
+        ("lobby/room found", lobby(game_type.JOINING, Room("banana kite", host_mac))),
+        ("lobby/hosting", lobby(game_type.HOSTING)),
+        ("lobby/hosting 4 joined", lobby(game_type.HOSTING, joined=4)),
+        ("game/waiting for host", game(False, None)),
+        ("game/armed", game(True, None)),
+        ("game/reacted", game(False, "234")),
+        ("game/scoreboard 8", game(False, "234", results=8)),
+        ("game/session 8", session(3)),
+    ]
+
+
+def render(app, ctx: RecordingCtx, frames: int) -> float:
+    """Update and draw `frames` frames; returns seconds of CPU spent."""
+    spent = 0.0
+    for _ in range(frames):
+        ctx.begin_frame()
+        started = time.perf_counter()
+        app.update(FRAME_MS)
+        app.draw(ctx)
+        spent += time.perf_counter() - started
+        ctx.end_frame()
+    return spent
+
+
+def peak_alloc_bytes(app, frames: int) -> int:
+    """Largest transient allocation of any one frame."""
+    ctx = RecordingCtx(record=False)
+    worst = 0
+    tracemalloc.start()
+    try:
+        for _ in range(frames):
+            ctx.begin_frame()
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            app.update(FRAME_MS)
+            app.draw(ctx)
+            _, peak = tracemalloc.get_traced_memory()
+            worst = max(worst, peak - before)
+            ctx.end_frame()
+    finally:
+        tracemalloc.stop()
+    return worst
+
+
+def measure(name: str, app, frames: int) -> dict:
+    ctx = RecordingCtx()
+    spent = render(app, ctx, frames)
+    totals: dict[str, int] = {}
+    for frame in ctx.frames:
+        for key, value in frame.as_dict().items():
+            totals[key] = totals.get(key, 0) + value
+    per_frame = {key: round(value / frames, 2) for key, value in totals.items()}
+    return {
+        "screen": name,
+        "frames": frames,
+        **per_frame,
+        "us_per_frame": round(spent / frames * 1_000_000, 1),
+        "peak_alloc_bytes": peak_alloc_bytes(app, min(frames, 50)),
+        "sample": ctx.log,
+    }
+
+
+async def bench(frames: int) -> list[dict]:
+    Reactz = load_app("app").Reactz
+    badge = Badge(Medium(), make_mac(0xFF))
+    app = badge.call(Reactz)
+    results = []
+    for name, screen in badge.call(screens, badge):
+        app.focus = screen
+        app.cleared = False
+        results.append(badge.call(measure, name, app, frames))
+        badge.call(screen.close)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Reactz per-frame draw cost")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument(
+        "--json", help="also write the results (with one sample frame's ops) here"
+    )
+    args = parser.parse_args()
+
+    with quiet():
+        results = run(bench(args.frames))
+
+    columns = (
+        "ops",
+        "fills",
+        "gradients",
+        "texts",
+        "path_points",
+        "us_per_frame",
+        "peak_alloc_bytes",
+    )
+    print(f"{'screen':24}" + "".join(f"{c:>18}" for c in columns))
+    for result in results:
+        print(f"{result['screen']:24}" + "".join(f"{result[c]:>18}" for c in columns))
+    if args.json:
+        with open(args.json, "w") as output:
+            json.dump(results, output, indent=2, default=repr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+"""
+Stand-ins for the MicroPython and Tildagon OS modules the app imports, so its
+real code runs under CPython against a simulated `Medium`.
+"""
+
+import asyncio
+import importlib
+import os
+import sys
+import time
+import types
+
+from .badge import TICKS_HALFPERIOD, TICKS_MAX, TICKS_PERIOD, Badge, current_badge
+from .medium import (
+    ESP_ERR_ESPNOW_EXIST,
+    ESP_ERR_ESPNOW_FULL,
+    ESP_ERR_ESPNOW_NOT_FOUND,
+    MAX_PAYLOAD,
+)
+
+APP_PACKAGE = "reactz"
+
+
+def badge() -> Badge:
+    current = current_badge.get()
+    if current is None:
+        raise RuntimeError("No current badge; run this code through Badge.call/spawn")
+    return current
+
+
+# --- utime -------------------------------------------------------------------
+
+
+def ticks_ms() -> int:
+    current = current_badge.get()
+    if current is None:
+        return int(asyncio.get_running_loop().time() * 1000) & TICKS_MAX
+    return current.ticks_ms()
+
+
+def ticks_us() -> int:
+    current = current_badge.get()
+    if current is None:
+        return int(asyncio.get_running_loop().time() * 1_000_000) & TICKS_MAX
+    return current.ticks_us()
+
+
+def ticks_add(ticks: int, delta: int) -> int:
+    return (ticks + delta) & TICKS_MAX
+
+
+def ticks_diff(a: int, b: int) -> int:
+    return ((a - b + TICKS_HALFPERIOD) & TICKS_MAX) - TICKS_HALFPERIOD
+
+
+# --- aioespnow ---------------------------------------------------------------
+
+
+class AIOESPNow:
+    """The current badge's ESP-NOW interface (a singleton per badge, as on device)."""
+
+    def __init__(self):
+        self.radio = badge().radio
+
+    @property
+    def peers_table(self) -> dict[bytes, list[int]]:
+        return self.radio.peers_table
+
+    def active(self, flag: bool | None = None) -> bool:
+        if flag is not None:
+            self.radio.active = bool(flag)
+        return self.radio.active
+
+    def add_peer(self, mac: bytes, *args, **kwargs) -> None:
+        if mac in self.radio.peers:
+            raise OSError(ESP_ERR_ESPNOW_EXIST, "ESP_ERR_ESPNOW_EXIST")
+        if len(self.radio.peers) >= self.radio.medium.peer_limit:
+            raise OSError(ESP_ERR_ESPNOW_FULL, "ESP_ERR_ESPNOW_FULL")
+        self.radio.peers.append(mac)
+
+    def del_peer(self, mac: bytes) -> None:
+        if mac not in self.radio.peers:
+            raise OSError(ESP_ERR_ESPNOW_NOT_FOUND, "ESP_ERR_ESPNOW_NOT_FOUND")
+        self.radio.peers.remove(mac)
+
+    def get_peers(self) -> tuple:
+        return tuple((mac, b"", 0, 0, False) for mac in self.radio.peers)
+
+    def peer_count(self) -> tuple[int, int]:
+        return len(self.radio.peers), 0
+
+    def send(self, mac: bytes, msg: bytes, sync: bool = True) -> bool:
+        if not self.radio.active:
+            raise OSError(-12389, "ESP_ERR_ESPNOW_NOT_INIT")
+        if len(msg) > MAX_PAYLOAD:
+            raise ValueError("msg too long")
+        if mac not in self.radio.peers:
+            raise OSError(ESP_ERR_ESPNOW_NOT_FOUND, "ESP_ERR_ESPNOW_NOT_FOUND")
+        return self.radio.medium.transmit(self.radio, mac, msg) or not sync
+
+    async def asend(self, mac: bytes, msg: bytes, sync: bool = True) -> bool:
+        result = self.send(mac, msg, sync)
+        await asyncio.sleep(0)
+        return result
+
+    def any(self) -> bool:
+        return not self.radio.inbox.empty()
+
+    def recv(self, timeout_ms: int | None = None) -> list:
+        if self.radio.inbox.empty():
+            return [None, None]
+        return list(self.radio.inbox.get_nowait())
+
+    async def arecv(self) -> list:
+        return list(await self.radio.inbox.get())
+
+
+# --- network -----------------------------------------------------------------
+
+STA_IF = 0
+AP_IF = 1
+
+
+class WLAN:
+    def __init__(self, interface: int = STA_IF):
+        self.interface = interface
+        self.badge = badge()
+        self._active = True
+
+    def active(self, flag: bool | None = None) -> bool:
+        if flag is not None:
+            self._active = bool(flag)
+        return self._active
+
+    def disconnect(self) -> None:
+        pass
+
+    def isconnected(self) -> bool:
+        return False
+
+    def config(self, key: str):
+        if key == "mac":
+            return self.badge.mac
+        raise ValueError(key)
+
+
+# --- Tildagon OS -------------------------------------------------------------
+
+
+def clear_background(ctx) -> None:
+    ctx.rgb(0, 0, 0).rectangle(-120, -120, 240, 240).fill()
+
+
+class EventBus:
+    def __init__(self):
+        self.handlers: dict[type, list] = {}
+
+    def on(self, event_type, handler, app=None) -> None:
+        self.handlers.setdefault(event_type, []).append(handler)
+
+    def remove(self, event_type, handler, app=None) -> None:
+        handlers = self.handlers.get(event_type, [])
+        if handler in handlers:
+            handlers.remove(handler)
+
+    def emit(self, event) -> None:
+        for handler in list(self.handlers.get(type(event), [])):
+            handler(event)
+
+
+class Leds(list):
+    def write(self) -> None:
+        pass
+
+
+class Button:
+    def __init__(self, name: str):
+        self.name = name
+
+    def __contains__(self, other) -> bool:
+        return other is self
+
+    def __repr__(self) -> str:
+        return f"Button({self.name})"
+
+
+BUTTON_TYPES = {
+    name: Button(name)
+    for name in ("UP", "RIGHT", "CONFIRM", "DOWN", "LEFT", "CANCEL")
+}
+
+
+class ButtonDownEvent:
+    def __init__(self, button: Button):
+        self.button = button
+
+
+class ButtonUpEvent(ButtonDownEvent):
+    pass
+
+
+class Buttons:
+    def __init__(self, app=None):
+        self.pressed: set = set()
+        eventbus.on(ButtonDownEvent, self._on_down, app)
+
+    def _on_down(self, event: ButtonDownEvent) -> None:
+        self.pressed.add(event.button)
+
+    def get(self, button: Button) -> bool:
+        return button in self.pressed
+
+    def clear(self) -> None:
+        self.pressed.clear()
+
+
+class App:
+    def __init__(self):
+        pass
+
+
+class PatternDisable:
+    pass
+
+
+class PatternEnable:
+    pass
+
+
+class RequestStopAppEvent:
+    def __init__(self, app):
+        self.app = app
+
+
+eventbus = EventBus()
+
+
+def module(name: str, **attrs) -> types.ModuleType:
+    mod = types.ModuleType(name)
+    mod.__dict__.update(attrs)
+    return mod
+
+
+def install() -> None:
+    """Register the stand-in modules in `sys.modules` (idempotent)."""
+    if "aioespnow" in sys.modules and getattr(
+        sys.modules["aioespnow"], "__reactz_sim__", False
+    ):
+        return
+    modules = {
+        "utime": module(
+            "utime",
+            ticks_ms=ticks_ms,
+            ticks_us=ticks_us,
+            ticks_add=ticks_add,
+            ticks_diff=ticks_diff,
+            sleep=time.sleep,
+            TICKS_PERIOD=TICKS_PERIOD,
+        ),
+        "aioespnow": module("aioespnow", AIOESPNow=AIOESPNow, __reactz_sim__=True),
+        "network": module("network", WLAN=WLAN, STA_IF=STA_IF, AP_IF=AP_IF),
+        "app": module("app", App=App),
+        "app_components": module("app_components", clear_background=clear_background),
+        "tildagonos": module(
+            "tildagonos", tildagonos=types.SimpleNamespace(leds=Leds([None] * 13))
+        ),
+        "events": module("events"),
+        "events.input": module(
+            "events.input",
+            Buttons=Buttons,
+            BUTTON_TYPES=BUTTON_TYPES,
+            ButtonDownEvent=ButtonDownEvent,
+            ButtonUpEvent=ButtonUpEvent,
+        ),
+        "system": module("system"),
+        "system.eventbus": module("system.eventbus", eventbus=eventbus),
+        "system.patterndisplay": module("system.patterndisplay"),
+        "system.patterndisplay.events": module(
+            "system.patterndisplay.events",
+            PatternDisable=PatternDisable,
+            PatternEnable=PatternEnable,
+        ),
+        "system.scheduler": module("system.scheduler"),
+        "system.scheduler.events": module(
+            "system.scheduler.events", RequestStopAppEvent=RequestStopAppEvent
+        ),
+    }
+    sys.modules.update(modules)
+
+
+def load_app(name: str = "") -> types.ModuleType:
+    """
+    Import the app (this repository) as the package `reactz`, the way the
+    badge imports it as `apps.reactz`, and return the requested submodule.
+    """
+    install()
+    if APP_PACKAGE not in sys.modules:
+        package = types.ModuleType(APP_PACKAGE)
+        package.__path__ = [os.path.dirname(os.path.dirname(os.path.abspath(__file__)))]
+        sys.modules[APP_PACKAGE] = package
+        # every simulated badge shares one app, so keep their history off disk
+        importlib.import_module(f"{APP_PACKAGE}.history").store.path = None
+    return importlib.import_module(f"{APP_PACKAGE}.{name}" if name else APP_PACKAGE)
@@ -0,0 +1,161 @@
+import asyncio
+import random
+
+BROADCAST_MAC = b"\xff\xff\xff\xff\xff\xff"
+
+# MicroPython espnow error codes (ESP_ERR_ESPNOW_*)
+ESP_ERR_ESPNOW_FULL = -12392
+ESP_ERR_ESPNOW_NOT_FOUND = -12393
+ESP_ERR_ESPNOW_EXIST = -12395
+
+MAX_PAYLOAD = 250
+
+
+class LinkProfile:
+    """How frames travel from one badge to another."""
+
+    def __init__(
+        self,
+        latency_ms: float = 2.0,
+        jitter_ms: float = 1.0,
+        loss: float = 0.0,
+        duplicate: float = 0.0,
+        rssi: int = -50,
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.loss = loss
+        self.duplicate = duplicate
+        self.rssi = rssi
+
+
+class MediumStats:
+    def __init__(self):
+        self.sent = 0
+        self.delivered = 0
+        self.lost = 0
+        self.duplicated = 0
+        self.bytes_sent = 0
+        self.by_opcode: dict[int, int] = {}
+
+    def as_dict(self) -> dict:
+        return {
+            "sent": self.sent,
+            "delivered": self.delivered,
+            "lost": self.lost,
+            "duplicated": self.duplicated,
+            "bytes_sent": self.bytes_sent,
+            "by_opcode": dict(sorted(self.by_opcode.items())),
+        }
+
+
+class Radio:
+    """One badge's ESP-NOW interface: its peer table and receive buffer."""
+
+    def __init__(self, medium: "Medium", mac: bytes, domain: int):
+        self.medium = medium
+        self.mac = mac
+        self.domain = domain
+        self.active = False
+        self.peers: list[bytes] = []
+        self.peers_table: dict[bytes, list[int]] = {}
+        self.inbox: asyncio.Queue = asyncio.Queue()
+        self.badge = None
+
+    def receive(self, sender: bytes, msg: bytes, rssi: int) -> None:
+        if not self.active:
+            return
+        now = self.badge.ticks_ms() if self.badge else 0
+        self.peers_table[sender] = [rssi, now]
+        self.inbox.put_nowait((sender, msg))
+
+
+class Medium:
+    """
+    A shared simulated radio channel for any number of virtual badges.
+
+    Every badge attached to the medium gets a `Radio`. Badges in the same
+    broadcast `domain` hear each other; frames are delayed, dropped and
+    duplicated according to the `LinkProfile` for the (sender, receiver) pair,
+    falling back to `default_profile`. `peer_limit` mirrors the ESP-NOW limit
+    on registered peers (broadcast included).
+    """
+
+    def __init__(
+        self,
+        default_profile: LinkProfile | None = None,
+        peer_limit: int = 20,
+        seed: int | None = None,
+    ):
+        self.default_profile = default_profile or LinkProfile()
+        self.peer_limit = peer_limit
+        self.random = random.Random(seed)
+        self.radios: dict[bytes, Radio] = {}
+        self.links: dict[tuple[bytes, bytes], LinkProfile] = {}
+        self.stats = MediumStats()
+
+    def attach(self, mac: bytes, domain: int = 0) -> Radio:
+        radio = self.radios.get(mac)
+        if radio is None:
+            radio = self.radios[mac] = Radio(self, mac, domain)
+        return radio
+
+    def set_link(
+        self,
+        a: bytes,
+        b: bytes,
+        profile: LinkProfile,
+        symmetric: bool = True,
+    ) -> None:
+        self.links[(a, b)] = profile
+        if symmetric:
+            self.links[(b, a)] = profile
+
+    def profile(self, src: bytes, dst: bytes) -> LinkProfile:
+        return self.links.get((src, dst), self.default_profile)
+
+    def in_range(self, src: Radio, dst: Radio) -> bool:
+        return src is not dst and dst.active and src.domain == dst.domain
+
+    def transmit(self, src: Radio, dst_mac: bytes, msg: bytes) -> bool:
+        """
+        Put a frame on the air. Returns whether a unicast frame reached its
+        peer (ESP-NOW's link-level ACK); broadcasts always return True.
+        """
+        self.stats.sent += 1
+        self.stats.bytes_sent += len(msg)
+        if len(msg) > 2 and msg[0] == 0xB7:
+            opcode = msg[2]
+            self.stats.by_opcode[opcode] = self.stats.by_opcode.get(opcode, 0) + 1
+
+        if dst_mac == BROADCAST_MAC:
+            targets = [r for r in self.radios.values() if self.in_range(src, r)]
+        else:
+            dst = self.radios.get(dst_mac)
+            targets = [dst] if dst is not None and self.in_range(src, dst) else []
+
+        loop = asyncio.get_running_loop()
+        delivered = False
+        for dst in targets:
+            profile = self.profile(src.mac, dst.mac)
+            if self.random.random() < profile.loss:
+                self.stats.lost += 1
+                continue
+            copies = 1
+            if self.random.random() < profile.duplicate:
+                copies = 2
+                self.stats.duplicated += 1
+            for _ in range(copies):
+                delay_ms = profile.latency_ms + self.random.uniform(
+                    -profile.jitter_ms, profile.jitter_ms
+                )
+                loop.call_later(
+                    max(0.0, delay_ms) / 1000,
+                    dst.receive,
+                    src.mac,
+                    bytes(msg),
+                    profile.rssi,
+                )
+                self.stats.delivered += 1
+            delivered = True
+        return delivered or dst_mac == BROADCAST_MAC
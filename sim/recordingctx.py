@@ -0,0 +1,142 @@
+class FrameStats:
+    """What one frame asked the display to do."""
+
+    def __init__(self):
+        self.ops = 0
+        self.fills = 0
+        self.strokes = 0
+        self.gradients = 0
+        self.texts = 0
+        self.path_points = 0
+        self.saves = 0
+
+    def as_dict(self) -> dict:
+        return dict(self.__dict__)
+
+
+class RecordingCtx:
+    """
+    A stand-in for the badge's ctx that draws nothing but logs every call
+    with its arguments and counts fills, gradients, text draws and path
+    points per frame.
+
+    Drawing methods return the ctx so calls chain as on the badge. Set
+    `record` to False to keep only the counters (e.g. while measuring
+    allocations, so the log itself isn't counted).
+    """
+
+    CENTER = "center"
+    MIDDLE = "middle"
+    LEFT = "left"
+    RIGHT = "right"
+    TOP = "top"
+    BOTTOM = "bottom"
+
+    def __init__(self, record: bool = True):
+        self.record = record
+        self.log: list[tuple] = []
+        self.frames: list[FrameStats] = []
+        self.frame = FrameStats()
+        self.depth = 0
+        self.font_size = 0
+        self.text_align = self.LEFT
+        self.text_baseline = self.TOP
+
+    def begin_frame(self) -> None:
+        self.frame = FrameStats()
+        if self.record:
+            self.log = []
+
+    def end_frame(self) -> FrameStats:
+        self.frames.append(self.frame)
+        return self.frame
+
+    def op(self, name: str, args: tuple) -> "RecordingCtx":
+        self.frame.ops += 1
+        if self.record:
+            self.log.append((name, args))
+        return self
+
+    # state
+
+    def save(self):
+        self.frame.saves += 1
+        self.depth += 1
+        return self.op("save", ())
+
+    def restore(self):
+        # MainMenu restores once more than it saves; the badge tolerates it
+        self.depth = max(0, self.depth - 1)
+        return self.op("restore", ())
+
+    def rotate(self, angle):
+        return self.op("rotate", (angle,))
+
+    def translate(self, x, y):
+        return self.op("translate", (x, y))
+
+    def scale(self, x, y):
+        return self.op("scale", (x, y))
+
+    # paint
+
+    def rgb(self, r, g, b):
+        return self.op("rgb", (r, g, b))
+
+    def rgba(self, r, g, b, a):
+        return self.op("rgba", (r, g, b, a))
+
+    def radial_gradient(self, x0, y0, r0, x1, y1, r1):
+        self.frame.gradients += 1
+        return self.op("radial_gradient", (x0, y0, r0, x1, y1, r1))
+
+    def linear_gradient(self, x0, y0, x1, y1):
+        self.frame.gradients += 1
+        return self.op("linear_gradient", (x0, y0, x1, y1))
+
+    def add_stop(self, pos, colour, alpha):
+        return self.op("add_stop", (pos, colour, alpha))
+
+    # paths
+
+    def begin_path(self):
+        return self.op("begin_path", ())
+
+    def close_path(self):
+        return self.op("close_path", ())
+
+    def move_to(self, x, y):
+        self.frame.path_points += 1
+        return self.op("move_to", (x, y))
+
+    def line_to(self, x, y):
+        self.frame.path_points += 1
+        return self.op("line_to", (x, y))
+
+    def arc(self, x, y, radius, start, end, direction):
+        self.frame.path_points += 1
+        return self.op("arc", (x, y, radius, start, end, direction))
+
+    def rectangle(self, x, y, w, h):
+        self.frame.path_points += 4
+        return self.op("rectangle", (x, y, w, h))
+
+    def round_rectangle(self, x, y, w, h, r):
+        self.frame.path_points += 4
+        return self.op("round_rectangle", (x, y, w, h, r))
+
+    def fill(self):
+        self.frame.fills += 1
+        return self.op("fill", ())
+
+    def stroke(self):
+        self.frame.strokes += 1
+        return self.op("stroke", ())
+
+    def text(self, s):
+        self.frame.texts += 1
+        return self.op("text", (s,))
+
+    def text_width(self, s) -> float:
+        self.op("text_width", (s,))
+        return len(s) * self.font_size * 0.5
@@ -0,0 +1,344 @@
+import asyncio
+import contextvars
+import random
+import weakref
+
+from .badge import Badge, current_badge
+from .fakes import load_app, ticks_us
+from .medium import LinkProfile, Medium
+from .recordingctx import RecordingCtx
+
+POLL_MS = 5
+
+
+class TimedOut(Exception):
+    pass
+
+
+class RoomFull(Exception):
+    """More clients than the host's room has places for."""
+
+
+async def wait_until(
+    predicate, timeout_ms: int, what: str = "condition", poll_ms: int = POLL_MS
+) -> int:
+    """Poll `predicate` in virtual time; returns the ms waited."""
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    deadline = started + timeout_ms / 1000
+    while not predicate():
+        if loop.time() >= deadline:
+            raise TimedOut(f"{what} not reached after {timeout_ms}ms")
+        await asyncio.sleep(poll_ms / 1000)
+    return round((loop.time() - started) * 1000)
+
+
+def tag_tasks(loop, owners: weakref.WeakKeyDictionary) -> None:
+    """Note in `owners` the badge each new task runs as (tasks inherit it)."""
+
+    def factory(loop, coro, context=None):
+        task = asyncio.Task(coro, loop=loop, context=context)
+        owners[task] = (context or contextvars.copy_context()).run(current_badge.get)
+        return task
+
+    loop.set_task_factory(factory)
+
+
+async def track_peak_tasks(
+    owners: weakref.WeakKeyDictionary,
+    peak: dict[Badge, int],
+    poll_ms: int = POLL_MS,
+) -> None:
+    """Keep `peak` at the most live tasks seen at once on each badge."""
+    while True:
+        alive: dict[Badge, int] = {}
+        for task in asyncio.all_tasks():
+            badge = owners.get(task)
+            if badge is not None:
+                alive[badge] = alive.get(badge, 0) + 1
+        for badge, count in alive.items():
+            if count > peak.get(badge, 0):
+                peak[badge] = count
+        await asyncio.sleep(poll_ms / 1000)
+
+
+def make_mac(index: int, room: int = 0) -> bytes:
+    return bytes((0x02, 0x7A, room, index >> 8 & 0xFF, index & 0xFF, 0x01))
+
+
+class Player:
+    """A badge running the real multiplayer setup screen, with a simulated thumb."""
+
+    def __init__(self, badge: Badge, game_type: str, reaction_ms: tuple[int, int]):
+        setup_module = load_app("multiplayergame.multiplayergamesetup")
+        self.badge = badge
+        self.reaction_ms = reaction_ms
+        self.setup = badge.call(setup_module.MultiPlayerReactionGameSetup, game_type)
+        self.pressed_at: float | None = None  # loop time of the reaction press
+
+    def start(self) -> asyncio.Task:
+        return self.badge.spawn(self.setup.start())
+
+    def press(self, button: str) -> None:
+        self.badge.call(self.setup.handle_button, button)
+
+    @property
+    def game(self):
+        return self.setup.game
+
+    async def react(self, rng: random.Random) -> None:
+        """Press CONFIRM a human-ish reaction time after the stimulus."""
+        try:
+            await wait_until(lambda: self.game is not None and self.game.react_set, 20000)
+        except TimedOut:
+            return  # never saw the stimulus
+        # the badge draws and presents the stimulus frame; the player sees it
+        self.badge.call(self.setup.draw, RecordingCtx(record=False))
+        self.badge.call(self.setup.presented, ticks_us())
+        await asyncio.sleep(rng.randint(*self.reaction_ms) / 1000)
+        self.pressed_at = asyncio.get_running_loop().time()
+        self.press("CONFIRM")
+
+    async def react_rounds(self, rng: random.Random) -> None:
+        """Keep reacting, one press per stimulus, until cancelled."""
+        while True:
+            await self.react(rng)
+            await wait_until(lambda: not self.game.react_set, 20000)
+
+
+class Lobby:
+    """One host and its clients."""
+
+    def __init__(self, host: Player, clients: list[Player]):
+        self.host = host
+        self.clients = clients
+        self.fill_ms: int | None = None
+        self.round_ms: int | None = None
+        self.board_ms: int | None = None  # last press until everyone has the board
+        self.boards = 0  # clients that received the final board
+        self.results: dict[bytes, int] = {}
+        self.round_gaps_ms: list[int] = []  # final board until the next stimulus
+        self.champion: bytes | None = None
+
+    @property
+    def host_mac(self) -> bytes:
+        return self.host.badge.mac
+
+    @property
+    def room(self):
+        return self.host.setup.room
+
+    def client_room_index(self, client: Player) -> int:
+        directory = client.setup.directory
+        return directory.position(self.host_mac) if directory else -1
+
+    async def fill(self, timeout_ms: int) -> int:
+        """
+        Every client finds this host's room and joins; returns lobby fill time.
+        Raises `RoomFull` if the room can't take them all.
+        """
+        for client in self.clients:
+            client.badge.spawn(self.join(client, timeout_ms))
+        await wait_until(lambda: self.room is not None, timeout_ms, "room open")
+        capacity = self.room.players.capacity
+        if len(self.clients) > capacity:
+            # the host only acknowledges as many JOINs as it has places
+            raise RoomFull(
+                f"{len(self.clients)} clients for a room of {capacity} (host not counted)"
+            )
+        self.fill_ms = await wait_until(
+            lambda: len(self.room.players) >= len(self.clients)
+            and all(c.game is not None for c in self.clients),
+            timeout_ms,
+            "lobby fill",
+        )
+        return self.fill_ms
+
+    async def join(self, client: Player, timeout_ms: int) -> None:
+        await wait_until(
+            lambda: self.client_room_index(client) >= 0, timeout_ms, "room found"
+        )
+        client.badge.call(client.setup.select_room, self.client_room_index(client))
+        client.press("DOWN")
+
+    async def play_round(
+        self, rng: random.Random, timeout_ms: int, grace_ms: int = 3000
+    ) -> int:
+        """
+        Host starts, everyone reacts; returns ms from START until every client
+        has the board, or until `grace_ms` after the host finalised if some
+        never get it (e.g. they missed START on a lossy link).
+        """
+        players = [self.host] + self.clients
+        for player in players:
+            player.badge.spawn(player.react(rng))
+        self.host.press("DOWN")
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        await wait_until(
+            lambda: self.host.game is not None
+            and self.host.game.aggregator is not None
+            and self.host.game.aggregator.finalised,
+            timeout_ms,
+            "round finalised",
+        )
+        try:
+            await wait_until(lambda: all(c.game.results for c in self.clients), grace_ms)
+        except TimedOut:
+            pass
+        now = loop.time()
+        self.round_ms = round((now - started) * 1000)
+        self.results = dict(self.host.game.results)
+        self.boards = sum(1 for c in self.clients if c.game.results)
+        presses = [p.pressed_at for p in players if p.pressed_at is not None]
+        if presses:
+            self.board_ms = round((now - max(presses)) * 1000)
+        return self.round_ms
+
+    async def play_tournament(
+        self, rng: random.Random, format: str, rounds: int, timeout_ms: int
+    ) -> int:
+        """
+        Host runs a tournament, everyone reacts every round; records the gap
+        from each round's final board to the next stimulus and returns ms
+        until the tournament is over.
+        """
+        players = [self.host] + self.clients
+        reactors = [player.badge.spawn(player.react_rounds(rng)) for player in players]
+        setup = self.host.setup
+        while setup.tournament_format != format:
+            self.host.press("RIGHT")
+        setup.tournament_rounds = rounds
+        self.host.press("UP")
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        game = self.host.game
+        try:
+            await wait_until(lambda: game.aggregator is not None, timeout_ms, "round 1")
+            while True:
+                round_no = game.tournament.round
+                # the next round's START goes out as soon as this one finalises
+                await wait_until(
+                    lambda: game.aggregator.round_no > round_no
+                    or game.aggregator.finalised,
+                    timeout_ms,
+                    f"round {round_no} finalised",
+                )
+                if game.tournament.finished:
+                    break
+                finalised = loop.time()
+                await wait_until(
+                    lambda: game.live_round > round_no, timeout_ms, "next stimulus"
+                )
+                self.round_gaps_ms.append(round((loop.time() - finalised) * 1000))
+        finally:
+            for reactor in reactors:
+                reactor.cancel()
+        try:
+            await wait_until(lambda: all(c.game.results for c in self.clients), 3000)
+        except TimedOut:
+            pass
+        self.round_ms = round((loop.time() - started) * 1000)
+        self.results = dict(game.results)
+        self.boards = sum(1 for c in self.clients if c.game.results)
+        self.champion = game.tournament.champion
+        return self.round_ms
+
+
+async def play(
+    players: int = 4,
+    rooms: int = 1,
+    profile: LinkProfile | None = None,
+    seed: int = 0,
+    reaction_ms: tuple[int, int] = (180, 400),
+    timeout_ms: int = 30000,
+    tournament: str | None = None,
+    rounds: int = 5,
+) -> dict:
+    """
+    Build `rooms` lobbies of `players` badges each (host included) on one
+    medium, fill them, play one round (or a `tournament` of that format) in
+    every lobby and report timings, radio traffic and the most tasks alive
+    at once on the host and on any client.
+    """
+    game_type = load_app("mainmenu").GameType
+    loop = asyncio.get_running_loop()
+    owners: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+    tag_tasks(loop, owners)
+    rng = random.Random(seed)
+    random.seed(seed)  # the app picks room names and delays with `random`
+    medium = Medium(default_profile=profile, seed=seed)
+
+    lobbies = []
+    for r in range(rooms):
+        host = Player(Badge(medium, make_mac(0, r)), game_type.HOSTING, reaction_ms)
+        clients = [
+            Player(
+                Badge(medium, make_mac(i, r), skew_ms=rng.randint(0, 1 << 20)),
+                game_type.JOINING,
+                reaction_ms,
+            )
+            for i in range(1, players)
+        ]
+        lobbies.append(Lobby(host, clients))
+
+    for lobby in lobbies:
+        lobby.host.start()
+        for client in lobby.clients:
+            client.start()
+
+    started = loop.time()
+    peak_tasks: dict[Badge, int] = {}
+    tracker = loop.create_task(track_peak_tasks(owners, peak_tasks))
+    try:
+        await asyncio.gather(*(lobby.fill(timeout_ms) for lobby in lobbies))
+        lobby_stats = medium.stats.as_dict()
+        if tournament:
+            await asyncio.gather(
+                *(
+                    lobby.play_tournament(rng, tournament, rounds, timeout_ms)
+                    for lobby in lobbies
+                )
+            )
+        else:
+            await asyncio.gather(
+                *(lobby.play_round(rng, timeout_ms) for lobby in lobbies)
+            )
+    finally:
+        tracker.cancel()
+        for lobby in lobbies:
+            for player in [lobby.host] + lobby.clients:
+                player.badge.call(player.setup.close)
+
+    report = {
+        "players": players,
+        "rooms": rooms,
+        "seed": seed,
+        "lobby_fill_ms": [lobby.fill_ms for lobby in lobbies],
+        "round_ms": [lobby.round_ms for lobby in lobbies],
+        "board_ms": [lobby.board_ms for lobby in lobbies],
+        "boards_delivered": [lobby.boards for lobby in lobbies],
+        "results": [
+            {mac.hex(): ms for mac, ms in lobby.results.items()} for lobby in lobbies
+        ],
+        "elapsed_ms": round((loop.time() - started) * 1000),
+        "lobby_frames": lobby_stats["sent"],
+        "round_frames": medium.stats.sent - lobby_stats["sent"],
+        "frames": medium.stats.as_dict(),
+        # per badge, so it shows whether a badge's task count stays flat as
+        # rooms grow (the simulated thumb's own task included)
+        "peak_tasks": {
+            "host": max(peak_tasks.get(lobby.host.badge, 0) for lobby in lobbies),
+            "client": max(
+                (peak_tasks.get(c.badge, 0) for lobby in lobbies for c in lobby.clients),
+                default=0,
+            ),
+        },
+    }
+    if tournament:
+        report["tournament"] = tournament
+        report["round_gaps_ms"] = [lobby.round_gaps_ms for lobby in lobbies]
+        report["champions"] = [
+            lobby.champion.hex() if lobby.champion else None for lobby in lobbies
+        ]
+    return report
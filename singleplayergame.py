@@ -4,23 +4,33 @@ import math
 import utime
 from app_components import clear_background
 
+from . import history
 from .focusable import Focusable
+from .framescheduler import ARM_LEAD_MS, FrameRate
+from .reactionstats import ReactionStats
 
 
 class SinglePlayerReactionGame(Focusable):
     random_delay_ms: int = 0
     react_set: bool = False
-    start_ts: int = 0
+    start_ts: int = 0  # ticks_us the stimulus reached the screen
+    due_us: int = 0  # ticks_us the stimulus was due (the sleep returned)
+    onset_pending: bool = False  # stimulus due but not yet on screen
+    stimulus_drawn: bool = False  # ...and the last draw included it
+    onset_lag_us: int = 0  # last due-to-on-screen delay
     reacted_in: str | None = None
     cleared_background: bool = False
+    arm_at: int | None = None  # ticks_ms to switch to the max frame rate
+    trend: int = 0  # last reaction vs the moving average, see ReactionStats.trend
+    history_due: bool = False  # a reaction was recorded; flush once it's on screen
 
     def __init__(self):
-        pass
+        self.stats = ReactionStats()
 
-    def handle_button(self, button: str) -> None:
+    def handle_button(self, button: str, pressed_us: int | None = None) -> None:
         if button in ["CONFIRM", "RIGHT", "DOWN"]:
             if self.reacted_in is None:
-                self.on_reaction()
+                self.on_reaction(pressed_us)
             elif self.reacted_in:
                 # reset game
                 print("Reaction not set yet! Resetting game.")
@@ -28,13 +38,20 @@ class SinglePlayerReactionGame(Focusable):
 
     async def start(self):
         self.reacted_in = None
+        self.mark_dirty()
         assert not self.react_set, "Reaction already set!"
         self.random_delay_ms = random.randint(700, 1000)
+        self.arm_at = utime.ticks_add(
+            utime.ticks_ms(), self.random_delay_ms - ARM_LEAD_MS
+        )
         print(f"Reaction set! Wait {self.random_delay_ms} ms to react.")
         await asyncio.sleep(self.random_delay_ms / 1000)
-        # mark the moment the player should react
-        self.start_ts = utime.ticks_ms()
+        # the clock starts when the frame showing the stimulus is presented
+        self.due_us = utime.ticks_us()
+        self.onset_pending = True
+        self.stimulus_drawn = False
         self.react_set = True
+        self.mark_dirty()
         print("Go!")
 
     def restart(self):
@@ -44,21 +61,56 @@ class SinglePlayerReactionGame(Focusable):
         self.react_set = False
         self.start_ts = 0
         self.random_delay_ms = 0
+        self.arm_at = None
+        self.onset_pending = False
+        self.stimulus_drawn = False
+        self.mark_dirty()
         asyncio.create_task(self.start())
 
-    def on_reaction(self):
+    def on_reaction(self, pressed_us: int | None = None):
+        """`pressed_us`: when the button went down, if earlier than now."""
         print("Reaction received!")
-        if self.react_set:
-            now_ms = utime.ticks_ms()
-            elapsed_ms = utime.ticks_diff(now_ms, self.start_ts)
+        if pressed_us is None:
+            pressed_us = utime.ticks_us()
+        if self.react_set and (
+            self.onset_pending or utime.ticks_diff(pressed_us, self.start_ts) < 0
+        ):
+            # pressed before the stimulus was on screen, handled after it
+            print("Reaction not set yet!")
+        elif self.react_set:
+            elapsed_ms = utime.ticks_diff(pressed_us, self.start_ts) // 1000
             print(f"Reaction time: {elapsed_ms:.0f} ms")
             self.reacted_in = f"{elapsed_ms:.0f}"
+            history.store.record(history.MODE_SINGLE, elapsed_ms)
+            self.history_due = True
+            self.trend = self.stats.trend(elapsed_ms)
+            self.stats.add(elapsed_ms)
             # reset so next round can start
             self.react_set = False
             self.start_ts = 0
+            self.mark_dirty()
         else:
             print("Reaction not set yet!")
 
+    def presented(self, ticks_us: int) -> None:
+        if self.history_due:
+            # the result is on screen, so the round is over: a write can't delay it
+            self.history_due = False
+            history.store.flush_if_due()
+        if self.onset_pending and self.stimulus_drawn:
+            self.start_ts = ticks_us
+            self.onset_pending = False
+            self.onset_lag_us = utime.ticks_diff(ticks_us, self.due_us)
+            print(f"Stimulus on screen {self.onset_lag_us / 1000:.1f}ms after it was due")
+
+    def frame_rate(self) -> int:
+        if self.react_set:
+            return FrameRate.MAX
+        if self.arm_at is not None and self.reacted_in is None:
+            if utime.ticks_diff(utime.ticks_ms(), self.arm_at) >= 0:
+                return FrameRate.MAX
+        return FrameRate.IDLE
+
     def draw(self, ctx) -> None:
         if not self.cleared_background:
             clear_background(ctx)
@@ -66,9 +118,22 @@ class SinglePlayerReactionGame(Focusable):
 
         if self.react_set:
             ctx.rgb(1, 0, 0).arc(0, 0, 60, 0, 2 * math.pi, True).fill()
+            if self.onset_pending:
+                self.stimulus_drawn = True
         else:
             if self.reacted_in is not None:
                 ctx.rgb(0, 0.6, 0).arc(0, 0, 60, 0, 2 * math.pi, True).fill()
                 ctx.rgb(1, 1, 1).move_to(0, 0).text(f"{self.reacted_in}ms")
+                if self.stats.count > 1:
+                    self.draw_trend(ctx)
             else:
                 ctx.rgb(0.5, 0, 0.5).arc(0, 0, 40, 0, 2 * math.pi, True).fill()
+
+    def draw_trend(self, ctx) -> None:
+        ctx.font_size = 16
+        if self.trend:
+            label = "faster than usual" if self.trend < 0 else "slower than usual"
+            ctx.rgb(1, 1, 1).move_to(0, -28).text(label)
+        ctx.rgb(1, 1, 1).move_to(0, 26).text(
+            f"avg {self.stats.mean:.0f} p90 {self.stats.p90.value:.0f}"
+        )